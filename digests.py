@@ -0,0 +1,137 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def digest(body) -> bytes:
+    """Возвращает хэш байтов body."""
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+def hit_rate(hits, misses) -> float:
+    """Возвращает долю попаданий."""
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+def canonical(response) -> bytes:
+    """
+    Ответ API в каноническом виде для сравнения.
+    current_date не входит: сервер ставит в него своё время в каждом
+    ответе, и иначе ни один ответ не совпал бы с предыдущим.
+    """
+    return json.dumps(
+        {key: value for key, value in response.items()
+         if key != 'current_date'},
+        sort_keys=True, default=str
+    ).encode()
+
+
+class UnchangedResponse(dict):
+    """Ответ API, который совпал с предыдущим ответом."""
+
+
+class ResponseDigests:
+    """
+    Хэши последних ответов API по ключу, например по токену.
+    Если ответ совпал с прошлым, проверять и обрабатывать его заново
+    не нужно. Хранятся только хэши, не больше max_items, давно не
+    обновлявшиеся ключи вытесняются.
+    """
+
+    def __init__(self, max_items=1000):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._digests)
+
+    def unchanged(self, key, response) -> bool:
+        """Проверяет, что ответ совпал с прошлым ответом по ключу."""
+        response_digest = digest(canonical(response))
+        with self._lock:
+            unchanged = self._digests.get(key) == response_digest
+            if unchanged:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return unchanged
+
+    def remember(self, key, response):
+        """Запоминает хэш ответа."""
+        response_digest = digest(canonical(response))
+        with self._lock:
+            self._digests[key] = response_digest
+            self._digests.move_to_end(key)
+            while len(self._digests) > self.max_items:
+                self._digests.popitem(last=False)
+
+    def forget(self, key):
+        """Забывает ответ, который не удалось обработать."""
+        with self._lock:
+            self._digests.pop(key, None)
+
+    def clear(self):
+        """Забывает все ответы."""
+        with self._lock:
+            self._digests.clear()
+
+    def stats(self) -> dict:
+        """Возвращает число попаданий и их долю."""
+        return {'hits': self.hits, 'hit_rate': hit_rate(self.hits,
+                                                        self.misses)}
+
+
+class HomeworkDigests:
+    """
+    Хэши записей о работах из последних ответов API.
+    Позволяют пропускать проверку и рассылку для неизменившихся работ.
+    Хранится не больше max_items хэшей, давно не виденные вытесняются.
+    """
+
+    def __init__(self, max_items=1000):
+        self.max_items = max_items
+        self.hits = 0
+        self.misses = 0
+        self._digests = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(homework) -> bytes:
+        return digest(
+            json.dumps(homework, sort_keys=True, default=str).encode()
+        )
+
+    def unchanged(self, homework, prefix='') -> bool:
+        """
+        Проверяет, что запись о работе не менялась с прошлого раза.
+        prefix отделяет работы разных арендаторов.
+        """
+        name = f'{prefix}{homework.get("homework_name")}'
+        homework_digest = self._digest(homework)
+        with self._lock:
+            unchanged = self._digests.get(name) == homework_digest
+            if unchanged:
+                self._digests.move_to_end(name)
+                self.hits += 1
+            else:
+                self.misses += 1
+        return unchanged
+
+    def remember(self, homework, prefix=''):
+        """Запоминает хэш успешно обработанной записи о работе."""
+        name = f'{prefix}{homework["homework_name"]}'
+        homework_digest = self._digest(homework)
+        with self._lock:
+            self._digests[name] = homework_digest
+            self._digests.move_to_end(name)
+            while len(self._digests) > self.max_items:
+                self._digests.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Возвращает число попаданий и их долю."""
+        return {'hits': self.hits, 'hit_rate': hit_rate(self.hits,
+                                                        self.misses)}
@@ -7,3 +7,14 @@ class EnvironmentVariablesException(Exception):
 
     def __str__(self):
         return self.message
+
+
+class TenantRegistrationException(Exception):
+    def __init__(self, *args):
+        if args:
+            self.message = f'Не удалось зарегистрировать токен: {args[0]}'
+        else:
+            self.message = 'Не удалось зарегистрировать токен'
+
+    def __str__(self):
+        return self.message
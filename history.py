@@ -0,0 +1,132 @@
+import re
+import threading
+import time
+
+import storage
+
+HISTORY_LIMIT = 10
+
+
+def terms(text) -> list:
+    """
+    Разбивает имя работы или запрос на слова для индекса.
+    'username__hw05_final.zip' даёт ['hw05', 'final'].
+    """
+    text = text.lower().split('__')[-1]
+    if text.endswith('.zip'):
+        text = text[:-len('.zip')]
+    return re.findall(r'[^\W_]+', text)
+
+
+class HomeworkHistory:
+    """
+    История переходов статусов работ с поиском по словам имени.
+    Таблица history_terms — обратный индекс: слово имени указывает
+    на работы, в имени которых оно встречается. Индекс пополняется
+    при каждом переходе, поэтому поиск не сканирует историю и не
+    обращается к API. Запрос ищет работы, где каждое слово запроса
+    является началом какого-либо слова имени.
+    """
+
+    def __init__(self, path=None, clock=time.time):
+        self.clock = clock
+        self._db = storage.connect(path)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS transitions ('
+            'id INTEGER PRIMARY KEY, owner TEXT NOT NULL, '
+            'homework TEXT NOT NULL, status TEXT NOT NULL, '
+            'at TEXT NOT NULL, UNIQUE (owner, homework, status, at))'
+        )
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS history_terms ('
+            'owner TEXT NOT NULL, term TEXT NOT NULL, '
+            'homework TEXT NOT NULL, PRIMARY KEY (owner, term, homework)'
+            ') WITHOUT ROWID'
+        )
+        self._lock = threading.Lock()
+
+    def record(self, owner, homework, status, at=None):
+        """
+        Добавляет переход работы homework в статус status.
+        owner — чат владельца работы, at — время перехода в ISO 8601,
+        по умолчанию текущее. Повтор того же перехода не записывается.
+        """
+        at = at or time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                 time.gmtime(self.clock()))
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                self._db.execute(
+                    'INSERT OR IGNORE INTO transitions '
+                    '(owner, homework, status, at) VALUES (?, ?, ?, ?)',
+                    (owner, homework, status, at)
+                )
+                self._db.executemany(
+                    'INSERT OR IGNORE INTO history_terms '
+                    '(owner, term, homework) VALUES (?, ?, ?)',
+                    [(owner, term, homework) for term in set(terms(homework))]
+                )
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    def seen(self, owner, homework, status, at) -> bool:
+        """Проверяет, записан ли уже переход работы в status в момент at."""
+        with self._lock:
+            return self._db.execute(
+                'SELECT 1 FROM transitions WHERE owner = ? AND homework = ? '
+                'AND status = ? AND at = ?', (owner, homework, status, at)
+            ).fetchone() is not None
+
+    def _matches(self, owner, query) -> set:
+        # Из базы берутся работы по самому длинному слову запроса,
+        # обычно самому редкому, остальные слова проверяются по именам.
+        words = sorted(set(terms(query)), key=len, reverse=True)
+        if not words:
+            return set()
+        first, rest = words[0], words[1:]
+        return {
+            row[0] for row in self._db.execute(
+                'SELECT homework FROM history_terms '
+                'WHERE owner = ? AND term >= ? AND term < ?',
+                (owner, first, first + '\uffff')
+            )
+            if all(
+                any(term.startswith(word) for term in terms(row[0]))
+                for word in rest
+            )
+        }
+
+    def search(self, owner, query, limit=HISTORY_LIMIT) -> list:
+        """
+        Ищет работы владельца по словам запроса.
+        Возвращает до limit пар (работа, [(статус, время), ...])
+        с переходами в порядке времени.
+        """
+        with self._lock:
+            return [
+                (homework, self._db.execute(
+                    'SELECT status, at FROM transitions '
+                    'WHERE owner = ? AND homework = ? ORDER BY at, id',
+                    (owner, homework)
+                ).fetchall())
+                for homework in sorted(self._matches(owner, query))[:limit]
+            ]
+
+
+def benchmark(homeworks=10000, queries=1000) -> float:
+    """Возвращает среднее время поиска в миллисекундах."""
+    history = HomeworkHistory('')
+    for number in range(homeworks):
+        for status in ('reviewing', 'approved'):
+            history.record('chat', f'username__hw{number:05}_final.zip',
+                           status)
+    started = time.perf_counter()
+    for number in range(queries):
+        history.search('chat', f'hw{number % homeworks:05} final')
+    return (time.perf_counter() - started) / queries * 1000
+
+
+if __name__ == '__main__':
+    print(f'10k работ: {benchmark():.3f} мс на поиск')
@@ -1,12 +1,31 @@
+import hashlib
 import http
 import logging
 import os
+import queue
 import time
-from logging.handlers import RotatingFileHandler
+from contextlib import contextmanager
+from functools import partial
 
 import requests
 import telegram
 from dotenv import load_dotenv
+from telegram.ext import CommandHandler, Updater
+
+from digests import ResponseDigests, UnchangedResponse
+from exceptions import TenantRegistrationException
+from lease import Lease, LeaseKeeper, connect_leases
+from logs import CompressingRotatingFileHandler, in_background
+from notifiers import (CallableNotifier, Dispatcher, SmtpNotifier,
+                       TelegramNotifier, WebhookNotifier)
+from outbox import DEFAULT_SINK, Outbox
+from persistence import WriteBehind
+from pipeline import Pipeline, Stage
+from ratelimit import RateLimiter
+from singleflight import SingleFlight
+from state import HomeworkState
+from tenants import TenantQueue, TenantRegistry, TenantRunner
+from tracing import NOOP_SPAN, Tracer
 
 load_dotenv()
 
@@ -15,6 +34,33 @@ TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
 RETRY_PERIOD = 600
+STATE_MAX_ITEMS = int(os.getenv('STATE_MAX_ITEMS', 1000))
+STATE_FLUSH_INTERVAL = float(os.getenv('STATE_FLUSH_INTERVAL', 5))
+STATE_FLUSH_SIZE = int(os.getenv('STATE_FLUSH_SIZE', 500))
+EDIT_STATUS_MESSAGES = os.getenv('EDIT_STATUS_MESSAGES', '') == '1'
+API_GLOBAL_RATE = float(os.getenv('API_GLOBAL_RATE', 5))
+API_GLOBAL_BURST = float(os.getenv('API_GLOBAL_BURST', 20))
+API_TOKEN_RATE = float(os.getenv('API_TOKEN_RATE', 1 / 60))
+API_TOKEN_BURST = float(os.getenv('API_TOKEN_BURST', 10))
+EXTRA_CHAT_IDS = os.getenv('EXTRA_CHAT_IDS', '')
+WEBHOOK_URLS = os.getenv('WEBHOOK_URLS', '')
+SMTP_HOST = os.getenv('SMTP_HOST')
+SMTP_PORT = int(os.getenv('SMTP_PORT', 25))
+SMTP_FROM = os.getenv('SMTP_FROM')
+SMTP_TO = os.getenv('SMTP_TO', '')
+SMTP_USER = os.getenv('SMTP_USER')
+SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
+SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', '') == '1'
+PIPELINE_MODE = os.getenv('PIPELINE_MODE', '') == '1'
+PIPELINE_WORKERS = os.getenv('PIPELINE_WORKERS', '')
+PIPELINE_PUT_TIMEOUT = 5
+TRACE_FILE = os.getenv('TRACE_FILE')
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 1))
+LOG_ROTATE_INTERVAL = float(os.getenv('LOG_ROTATE_INTERVAL', 24 * 60 * 60))
+LOG_RETENTION = float(os.getenv('LOG_RETENTION', 7 * 24 * 60 * 60))
+TENANT_KEY = os.getenv('TENANT_KEY')
+TENANT_WORKERS = int(os.getenv('TENANT_WORKERS', 8))
+HISTORY_COMMAND = os.getenv('HISTORY_COMMAND', '') == '1'
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
@@ -32,13 +78,22 @@ logging.basicConfig(
 )
 
 logger = logging.getLogger(__name__)
-handler = RotatingFileHandler(
+handler = CompressingRotatingFileHandler(
     'main.log',
     maxBytes=50000000,
     backupCount=5,
-    encoding='utf-8'
+    encoding='utf-8',
+    interval=LOG_ROTATE_INTERVAL,
+    retention=LOG_RETENTION
+)
+logger.addHandler(in_background(handler))
+
+rate_limiter = RateLimiter(
+    API_GLOBAL_RATE, API_GLOBAL_BURST, API_TOKEN_RATE, API_TOKEN_BURST
 )
-logger.addHandler(handler)
+api_calls = SingleFlight()
+response_digests = ResponseDigests(STATE_MAX_ITEMS)
+tracer = Tracer(TRACE_FILE, TRACE_SAMPLE_RATE)
 
 
 def check_tokens() -> bool:
@@ -55,27 +110,94 @@ def check_tokens() -> bool:
 
 def send_message(bot, message):
     """Функция отправляет сообщение в Telegram чат."""
+    return send_chat_message(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_chat_message(bot, chat_id, message):
+    """Отправляет сообщение в чат chat_id."""
     try:
-        bot.send_message(
-            chat_id=TELEGRAM_CHAT_ID,
+        sent = bot.send_message(
+            chat_id=chat_id,
             text=message
         )
         logger.debug('Успешная отправке сообщения в Telegram')
     except Exception:
         logger.error('Ошибка отправки сообщения в Telegram')
         raise Exception('Ошибка отправки сообщения в Telegram')
+    return sent
+
+
+def edit_message(bot, message_id, message, chat_id=None):
+    """Функция заменяет текст ранее отправленного сообщения."""
+    try:
+        bot.edit_message_text(
+            chat_id=chat_id or TELEGRAM_CHAT_ID,
+            message_id=message_id,
+            text=message
+        )
+        logger.debug('Успешное изменение сообщения в Telegram')
+    except Exception:
+        logger.error('Ошибка изменения сообщения в Telegram')
+        raise Exception('Ошибка изменения сообщения в Telegram')
+
+
+def deliver_message(bot, message, homework, status_messages, chat_id=None):
+    """
+    Доставляет сообщение о работе homework.
+    В режиме EDIT_STATUS_MESSAGES о каждой работе ведётся одно сообщение,
+    которое обновляется при смене статуса. Если его не удалось изменить,
+    например оно удалено, отправляется новое. chat_id задаётся для
+    арендаторов, по умолчанию сообщение уходит в TELEGRAM_CHAT_ID.
+    """
+    send = (
+        partial(send_message, bot) if chat_id is None
+        else partial(send_chat_message, bot, chat_id)
+    )
+    with homework_trace(homework, chat_id or ''), \
+            tracer.span('send_message', homework=homework):
+        if not EDIT_STATUS_MESSAGES or homework is None:
+            send(message)
+            return
+        key = homework if chat_id is None else f'{chat_id}:{homework}'
+        message_id = status_messages.get(key)
+        if message_id is not None:
+            try:
+                edit_message(bot, int(message_id), message, chat_id)
+                return
+            except Exception:
+                logger.info(f'Отправляю новое сообщение о работе {homework}')
+        sent = send(message)
+        if sent is not None:
+            status_messages.put(key, str(sent.message_id))
 
 
 def get_api_answer(timestamp):
     """
     Функция делает запрос к эндпоинту API и роверяет статус ответа.
-    Возвращает response.
+    Возвращает response. Одновременные запросы с тем же токеном и
+    timestamp ждут один общий ответ.
     """
+    return get_tenant_answer(PRACTICUM_TOKEN, timestamp)
+
+
+def get_tenant_answer(token, timestamp):
+    """Запрос к API с токеном арендатора, повторы объединяются."""
+    return api_calls.do(
+        (token, timestamp), fetch_api_answer, token, timestamp
+    )
+
+
+def fetch_api_answer(token, timestamp):
+    """Выполняет запрос к API с учётом лимитов."""
+    rate_limiter.acquire(token)
     try:
         payload = {'from_date': timestamp}
         response = requests.get(
             ENDPOINT,
-            headers=HEADERS,
+            headers=(
+                HEADERS if token == PRACTICUM_TOKEN
+                else {'Authorization': f'OAuth {token}'}
+            ),
             params=payload
         )
         if response.status_code != http.HTTPStatus.OK:
@@ -84,7 +206,7 @@ def get_api_answer(timestamp):
                 f'Код ответа API: {response.status_code}'
             )
             raise Exception(f'Код ответа API: {response.status_code}')
-        response = response.json()
+        response = parse_api_body(response, token)
     except requests.RequestException():
         logger.error(
             'Проблема с соединением'
@@ -93,6 +215,21 @@ def get_api_answer(timestamp):
         return response
 
 
+def parse_api_body(response, token):
+    """
+    Разбирает тело ответа API.
+    Ответ, совпавший с прошлым ответом для токена, помечается
+    UnchangedResponse, и его не нужно обрабатывать заново.
+    """
+    parsed = response.json()
+    if not isinstance(parsed, dict):
+        return parsed
+    if response_digests.unchanged(token, parsed):
+        return UnchangedResponse(parsed)
+    response_digests.remember(token, parsed)
+    return parsed
+
+
 def check_response(response):
     """Проверяет ответ API на соответствие документации."""
     if not isinstance(response, dict):
@@ -128,6 +265,451 @@ def parse_status(homework) -> str:
     )
 
 
+def build_notifiers(bot, status_messages) -> list:
+    """
+    Собирает получателей уведомлений из переменных окружения.
+    Первым всегда идёт основной чат TELEGRAM_CHAT_ID.
+    """
+    notifiers = [CallableNotifier(
+        DEFAULT_SINK,
+        lambda text, homework: deliver_message(
+            bot, text, homework, status_messages
+        )
+    )]
+    for chat_id in filter(None, EXTRA_CHAT_IDS.split(',')):
+        notifiers.append(TelegramNotifier(bot, chat_id.strip()))
+    for url in filter(None, WEBHOOK_URLS.split(',')):
+        notifiers.append(WebhookNotifier(url.strip()))
+    if SMTP_HOST:
+        notifiers.append(SmtpNotifier(
+            SMTP_HOST, SMTP_PORT, SMTP_FROM,
+            [address.strip() for address in SMTP_TO.split(',')],
+            username=SMTP_USER,
+            password=SMTP_PASSWORD,
+            starttls=SMTP_STARTTLS
+        ))
+    return notifiers
+
+
+def check_homeworks(homeworks, state, dispatcher, owner=''):
+    """
+    Ставит в очередь сообщения о работах с изменившимся статусом.
+    owner — чат арендатора, его работы хранятся отдельно от работ
+    основного токена. Переходы статусов попадают в историю работ.
+    """
+    for homework in changed_homeworks(homeworks, state, owner):
+        with homework_trace(homework['homework_name'], owner):
+            enqueue_homework(
+                state, dispatcher, homework, render_homework(homework), owner
+            )
+
+
+def homework_trace(homework, owner=''):
+    """
+    Отрезок в трассе работы homework чата owner.
+    У каждой работы своя трасса: её parse_status, enqueue и send_message
+    из разных итераций собираются вместе, а ссылка ведёт к итерации.
+    """
+    if homework is None:
+        return NOOP_SPAN
+    return tracer.linked('homework', f'{owner}:{homework}',
+                         homework=homework)
+
+
+def changed_homeworks(homeworks, state, owner='') -> list:
+    """
+    Отбирает работы, переход которых ещё не обработан.
+    Работы без нового статуса сразу запоминаются как обработанные.
+    """
+    prefix = f'{owner}:' if owner else ''
+    changed = []
+    for homework in homeworks:
+        if state.digests.unchanged(homework, prefix):
+            continue
+        if is_new_status(state, homework, owner):
+            changed.append(homework)
+        else:
+            logger.debug('Отсутствие в ответе новых статусов')
+            state.digests.remember(homework, prefix)
+    return changed
+
+
+def render_homework(homework) -> str:
+    """Текст сообщения о новом статусе работы."""
+    with tracer.span('parse_status', homework=homework.get('homework_name'),
+                     status=homework.get('status')):
+        return parse_status(homework)
+
+
+def enqueue_homework(state, dispatcher, homework, message, owner=''):
+    """
+    Ставит сообщение о работе в очередь.
+    Новый статус запоминается в состоянии и истории работ.
+    """
+    prefix = f'{owner}:' if owner else ''
+    name = homework['homework_name']
+    verdict = homework['status']
+    with tracer.span('enqueue', homework=name, status=verdict):
+        dispatcher.put(homework_key(homework), message, topic=name)
+        state.set(prefix + name, verdict)
+        state.history.record(
+            owner, name, verdict, homework.get('date_updated')
+        )
+    state.digests.remember(homework, prefix)
+
+
+def is_new_status(state, homework, owner='') -> bool:
+    """
+    Проверяет, что переход работы в её статус ещё не обработан.
+    Статус в памяти HomeworkState может устареть, если работу с тех пор
+    обрабатывала другая реплика с общей базой, поэтому переход с
+    date_updated сверяется с историей переходов в базе. Без date_updated
+    сравнивается только статус.
+    """
+    prefix = f'{owner}:' if owner else ''
+    name = homework.get('homework_name')
+    verdict = homework.get('status')
+    date_updated = homework.get('date_updated')
+    if date_updated is None:
+        return state.get(prefix + name) != verdict
+    return not state.history.seen(owner, name, verdict, date_updated)
+
+
+def homework_key(homework) -> str:
+    """Ключ перехода статуса, по которому очередь отсеивает повторы."""
+    return (
+        f'{homework.get("id", homework["homework_name"])}:'
+        f'{homework["status"]}:{homework.get("date_updated", "")}'
+    )
+
+
+def poll_homeworks(timestamp, state, dispatcher, tenant=None, fetch=None):
+    """
+    Опрашивает API и ставит в очередь сообщения о новых статусах.
+    Без tenant опрашивается основной токен PRACTICUM_TOKEN. fetch
+    заменяет запрос к API, например в симуляции.
+    """
+    token = PRACTICUM_TOKEN if tenant is None else tenant.token
+    if fetch is None:
+        fetch = (
+            get_api_answer if tenant is None
+            else partial(get_tenant_answer, token)
+        )
+    with tracer.span('get_api_answer'):
+        response = fetch(timestamp)
+    if isinstance(response, UnchangedResponse):
+        logger.debug(
+            f'Ответ API не изменился: {response_digests.stats()}, '
+            f'работы: {state.digests.stats()}'
+        )
+        return
+    with forget_on_error(token):
+        with tracer.span('check_response'):
+            check_response(response)
+        check_homeworks(
+            response['homeworks'], state, dispatcher,
+            '' if tenant is None else tenant.chat_id
+        )
+
+
+@contextmanager
+def forget_on_error(token):
+    """
+    Забывает хэш ответа API для токена при ошибке обработки.
+    Тогда следующий такой же ответ обработается заново.
+    """
+    try:
+        yield
+    except Exception:
+        response_digests.forget(token)
+        raise
+
+
+def run_iteration(timestamp, state, dispatcher, fetch=None):
+    """
+    Опрашивает API и рассылает уведомления в текущем потоке.
+    Возвращает, удался ли опрос.
+    """
+    polled = True
+    try:
+        poll_homeworks(timestamp, state, dispatcher, fetch=fetch)
+    except Exception as error:
+        message = f'Сбой в работе программы: {error}'
+        logger.error(message)
+        polled = False
+    with tracer.span('flush'):
+        dispatcher.flush()
+    return polled
+
+
+def fetch_stage(timestamp):
+    """Стадия fetch: запрос к API. None означает сбой запроса."""
+    try:
+        with tracer.span('get_api_answer'):
+            return [get_api_answer(timestamp)]
+    except Exception as error:
+        logger.error(f'Сбой в работе программы: {error}')
+        return [None]
+
+
+def diff_stage(state, response):
+    """Стадия diff: проверка ответа и отбор работ с новым статусом."""
+    if response is None or isinstance(response, UnchangedResponse):
+        return [None]
+    with forget_on_error(PRACTICUM_TOKEN):
+        with tracer.span('check_response'):
+            check_response(response)
+        return changed_homeworks(response['homeworks'], state) + [None]
+
+
+def render_stage(homework):
+    """Стадия render: текст сообщения о работе."""
+    if homework is None:
+        return [None]
+    with forget_on_error(PRACTICUM_TOKEN), \
+            homework_trace(homework.get('homework_name')):
+        return [(homework, render_homework(homework))]
+
+
+def deliver_stage(state, dispatcher, item):
+    """Стадия deliver: постановка в очередь и рассылка уведомлений."""
+    if item is not None:
+        homework, message = item
+        with forget_on_error(PRACTICUM_TOKEN), \
+                homework_trace(homework['homework_name']):
+            enqueue_homework(state, dispatcher, homework, message)
+    with tracer.span('flush'):
+        dispatcher.flush()
+
+
+def build_pipeline(state, dispatcher) -> Pipeline:
+    """
+    Собирает конвейер fetch -> diff -> render -> deliver.
+    Число потоков стадий задаётся в PIPELINE_WORKERS, например
+    'fetch=1,render=2'. None между стадиями значит, что новых статусов
+    нет и нужно только повторить отправку очереди уведомлений; такой
+    же None каждую итерацию передаётся прямо в deliver.
+    """
+    workers = dict(
+        (name.strip(), int(count))
+        for name, count in (
+            pair.split('=') for pair in PIPELINE_WORKERS.split(',') if pair
+        )
+    )
+    return Pipeline([
+        Stage(name, func, workers.get(name, 1))
+        for name, func in (
+            ('fetch', fetch_stage),
+            ('diff', partial(diff_stage, state)),
+            ('render', render_stage),
+            ('deliver', partial(deliver_stage, state, dispatcher)),
+        )
+    ])
+
+
+def feed_pipeline(pipeline, timestamp):
+    """
+    Передаёт конвейеру повтор отправки очереди и опрос API.
+    Повтор идёт прямо в стадию deliver, поэтому очередь уведомлений
+    отправляется, даже если запрос к API завис. Элемент, для которого
+    за PIPELINE_PUT_TIMEOUT не нашлось места в очереди стадии,
+    пропускается.
+    """
+    for stage, item in (('deliver', None), ('fetch', timestamp)):
+        try:
+            pipeline.put(item, timeout=PIPELINE_PUT_TIMEOUT, stage=stage)
+        except queue.Full:
+            logger.warning(
+                f'Очередь стадии {stage} заполнена, итерация пропущена'
+            )
+
+
+def tenant_lease_name(token) -> str:
+    """Имя аренды, под которой опрашивается API для данного токена."""
+    digest = hashlib.sha256(str(token).encode()).hexdigest()
+    return f'practicum:{digest[:16]}'
+
+
+def poll_tenant(registry, state, outbox, bot, status_messages, leases,
+                chat_id):
+    """
+    Опрашивает API для арендатора из реестра и рассылает его очередь.
+    Арендатора опрашивает та реплика, что первой взяла его аренду на
+    период опроса, так реплики делят арендаторов между собой.
+    """
+    tenant = registry.get(chat_id)
+    if tenant is None:
+        return
+    lease = Lease(tenant_lease_name(tenant.token), ttl=RETRY_PERIOD,
+                  db=leases)
+    if not lease.acquire():
+        logger.debug(f'Арендатора {chat_id} опрашивает другая реплика')
+        return
+    queue = TenantQueue(outbox, chat_id)
+    with tracer.trace('tenant', chat=chat_id):
+        try:
+            poll_homeworks(int(tenant.registered_at), state, queue, tenant)
+        except Exception as error:
+            logger.error(f'Сбой опроса арендатора {chat_id}: {error}')
+        with tracer.span('flush'):
+            queue.flush(lambda text, homework: deliver_message(
+                bot, text, homework, status_messages, chat_id
+            ))
+
+
+def reply(update, context, text):
+    """Отвечает в чат, из которого пришла команда."""
+    context.bot.send_message(chat_id=update.effective_chat.id, text=text)
+
+
+def register_command(registry, runner, update, context):
+    """
+    Команда /register <токен>: подписывает чат на статусы работ.
+    Токен проверяется запросом к API, сообщение с ним удаляется.
+    """
+    chat_id = str(update.effective_chat.id)
+    if len(context.args) != 1:
+        reply(update, context, 'Использование: /register <токен Практикума>')
+        return
+    token = context.args[0]
+    try:
+        update.effective_message.delete()
+    except Exception:
+        logger.info(f'Не удалось удалить сообщение с токеном в {chat_id}')
+    try:
+        check_response(get_tenant_answer(token, int(time.time())))
+        registry.register(chat_id, token)
+    except TenantRegistrationException as error:
+        reply(update, context, str(error))
+        return
+    except Exception as error:
+        logger.info(f'Токен из чата {chat_id} не принят: {error}')
+        reply(update, context, 'API Практикума не принял этот токен.')
+        return
+    runner.add(chat_id)
+    reply(update, context, 'Готово: статусы работ будут приходить сюда.')
+
+
+def unregister_command(registry, runner, update, context):
+    """Команда /unregister: отписывает чат и удаляет его токен."""
+    chat_id = str(update.effective_chat.id)
+    runner.remove(chat_id)
+    tenant = registry.get(chat_id)
+    if tenant is not None:
+        response_digests.forget(tenant.token)
+    if registry.unregister(chat_id):
+        reply(update, context, 'Токен удалён, уведомлений больше не будет.')
+    else:
+        reply(update, context, 'Этот чат не зарегистрирован.')
+
+
+def format_history(homework, transitions) -> str:
+    """Текст истории одной работы для ответа на /history."""
+    homework_name = homework.replace('username__', '').replace('.zip', '')
+    return '\n'.join([f'"{homework_name}":'] + [
+        f'{at} — {HOMEWORK_VERDICTS.get(status, status)}'
+        for status, at in transitions
+    ])
+
+
+def history_command(history, update, context):
+    """
+    Команда /history <запрос>: история статусов работ чата.
+    Отвечает из локального индекса, без запроса к API.
+    """
+    chat_id = str(update.effective_chat.id)
+    query = ' '.join(context.args)
+    if not query:
+        reply(update, context, 'Использование: /history <название работы>')
+        return
+    found = history.search(
+        '' if chat_id == str(TELEGRAM_CHAT_ID) else chat_id, query
+    )
+    reply(update, context, '\n\n'.join(
+        format_history(homework, transitions)
+        for homework, transitions in found
+    ) or f'Работы по запросу "{query}" не найдены.')
+
+
+def updates_lease_name(token) -> str:
+    """Имя аренды на приём команд для токена бота."""
+    digest = hashlib.sha256(str(token).encode()).hexdigest()
+    return f'telegram:{digest[:16]}'
+
+
+class CommandPolling:
+    """
+    Приём команд бота через getUpdates.
+    Telegram отдаёт обновления токена только одному получателю, поэтому
+    команды принимает реплика, которая держит аренду: объект передаётся
+    в LeaseKeeper как on_change и запускает или останавливает Updater.
+    """
+
+    def __init__(self, bot, handlers):
+        """Запоминает бота и обработчики команд."""
+        self.bot = bot
+        self.handlers = handlers
+        self.updater = None
+
+    def __call__(self, held):
+        """Запускает приём команд при аренде, без неё — останавливает."""
+        if held and self.updater is None:
+            self.updater = Updater(bot=self.bot, use_context=True)
+            for handler in self.handlers:
+                self.updater.dispatcher.add_handler(handler)
+            self.updater.start_polling()
+        elif not held and self.updater is not None:
+            self.updater.stop()
+            self.updater = None
+
+
+def start_commands(bot, state, outbox, status_messages):
+    """
+    Запускает команды бота и опрос арендаторов.
+    /history работает при HISTORY_COMMAND=1, /register и /unregister —
+    если задан ключ шифрования токенов TENANT_KEY. Команды принимает
+    одна реплика, опрос арендаторов делят все. Возвращает функцию
+    остановки.
+    """
+    handlers = []
+    stops = []
+    if HISTORY_COMMAND:
+        handlers.append(CommandHandler(
+            'history', partial(history_command, state.history)
+        ))
+    if TENANT_KEY:
+        registry = TenantRegistry(TENANT_KEY)
+        runner = TenantRunner(
+            registry,
+            partial(poll_tenant, registry, state, outbox, bot,
+                    status_messages, connect_leases()),
+            period=RETRY_PERIOD,
+            workers=TENANT_WORKERS
+        )
+        runner.start()
+        stops.append(runner.stop)
+        handlers.extend(
+            CommandHandler(command, partial(callback, registry, runner))
+            for command, callback in (
+                ('register', register_command),
+                ('unregister', unregister_command),
+            )
+        )
+        logger.info(f'Арендаторов в реестре: {len(registry)}')
+    if handlers:
+        updates = LeaseKeeper(
+            Lease(updates_lease_name(TELEGRAM_TOKEN)),
+            on_change=CommandPolling(bot, handlers)
+        )
+        updates.start()
+        stops.insert(0, updates.stop)
+
+    def stop():
+        for func in stops:
+            func()
+    return stop
+
+
 def main():
     """Основная логика работы бота."""
     if not check_tokens():
@@ -137,25 +719,44 @@ def main():
                         'доступность переменных окружения')
     bot = telegram.Bot(token=TELEGRAM_TOKEN)
     timestamp = int(time.time())
-    answer = ''
+    response_digests.clear()
+    state = HomeworkState(
+        max_items=STATE_MAX_ITEMS,
+        flush_interval=STATE_FLUSH_INTERVAL,
+        flush_size=STATE_FLUSH_SIZE
+    )
+    state.start()
+    status_messages = WriteBehind('status_messages', flush_size=1)
+    outbox = Outbox()
+    dispatcher = Dispatcher(build_notifiers(bot, status_messages), outbox)
+    stop_commands = start_commands(bot, state, outbox, status_messages)
+    lease = LeaseKeeper(Lease(tenant_lease_name(PRACTICUM_TOKEN)))
+    lease.start()
+    pipeline = build_pipeline(state, dispatcher) if PIPELINE_MODE else None
+    if pipeline is not None:
+        pipeline.start()
 
-    while True:
-        try:
-            response = get_api_answer(timestamp)
-            check_response(response)
-            if response['homeworks']:
-                verdict = response['homeworks'][0]['status']
-                message = parse_status(response['homeworks'][0])
-                if verdict != answer:
-                    answer = verdict
-                    send_message(bot, message)
+    try:
+        while True:
+            with tracer.trace('iteration'):
+                if not lease.held:
+                    logger.debug('API опрашивает другая реплика')
+                elif pipeline is not None:
+                    feed_pipeline(pipeline, timestamp)
+                    logger.debug(f'Стадии конвейера: {pipeline.report()}')
                 else:
-                    logging.debug('Отсутствие в ответе новых статусов')
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logger.error(message)
-        finally:
+                    run_iteration(timestamp, state, dispatcher)
+                logger.debug(f'Лимиты запросов к API: {rate_limiter.stats()}')
+                logger.debug(f'Склеенные запросы к API: {api_calls.stats()}')
             time.sleep(RETRY_PERIOD)
+    finally:
+        if pipeline is not None:
+            pipeline.stop()
+        stop_commands()
+        lease.stop()
+        state.close()
+        dispatcher.close()
+        tracer.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,143 @@
+import logging
+import os
+import socket
+import threading
+import time
+
+import storage
+
+logger = logging.getLogger(__name__)
+
+LEASE_TTL = 30
+# Общее соединение из connect_leases не допускает вложенных транзакций
+# из разных потоков.
+_shared_db_lock = threading.Lock()
+
+
+def connect_leases(path=None):
+    """
+    Открывает таблицу аренд.
+    Соединение можно передавать в Lease, чтобы не открывать новое
+    на каждую аренду, например по одной аренде на арендатора.
+    """
+    db = storage.connect(path)
+    db.execute(
+        'CREATE TABLE IF NOT EXISTS leases ('
+        'name TEXT PRIMARY KEY, owner TEXT NOT NULL, '
+        'expires_at REAL NOT NULL)'
+    )
+    return db
+
+
+class Lease:
+    """
+    Аренда с ограниченным сроком в таблице SQLite.
+    Пока аренда не истекла, работу выполняет только её владелец.
+    Таблица общая для всех реплик, которые смотрят в один BOT_DB_PATH.
+    """
+
+    def __init__(self, name, ttl=LEASE_TTL, owner=None, path=None,
+                 clock=time.time, db=None):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}'
+        self.clock = clock
+        self._db = db or connect_leases(path)
+        self._lock = _shared_db_lock if db else threading.Lock()
+
+    def acquire(self) -> bool:
+        """Захватывает или продлевает аренду. Возвращает успех."""
+        with self._lock:
+            return self._acquire(self.clock())
+
+    def _acquire(self, now):
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._db.execute(
+                'SELECT owner, expires_at FROM leases WHERE name = ?',
+                (self.name,)
+            ).fetchone()
+            acquired = (
+                row is None or row[0] == self.owner or row[1] <= now
+            )
+            if acquired:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO leases (name, owner, expires_at) '
+                    'VALUES (?, ?, ?)',
+                    (self.name, self.owner, now + self.ttl)
+                )
+        finally:
+            self._db.execute('COMMIT')
+        return acquired
+
+    def release(self):
+        """Освобождает аренду, если она принадлежит этому процессу."""
+        with self._lock:
+            self._db.execute(
+                'DELETE FROM leases WHERE name = ? AND owner = ?',
+                (self.name, self.owner)
+            )
+
+
+class LeaseKeeper(threading.Thread):
+    """
+    Фоновый поток, который продлевает аренду каждую треть её срока.
+    on_change(held) вызывается при получении и потере аренды.
+    """
+
+    def __init__(self, lease, on_change=None):
+        super().__init__(name=f'lease-{lease.name}', daemon=True)
+        self.lease = lease
+        self.on_change = on_change
+        self._expires_at = 0
+        self._stopped = threading.Event()
+
+    @property
+    def held(self) -> bool:
+        """Аренда принадлежит процессу и ещё не истекла."""
+        return self.lease.clock() < self._expires_at
+
+    def start(self):
+        """Пытается захватить аренду сразу и запускает продление."""
+        self._renew()
+        super().start()
+
+    def run(self):
+        """Продлевает аренду, пока поток не остановлен."""
+        while not self._stopped.wait(self.lease.ttl / 3):
+            self._renew()
+
+    def _renew(self):
+        expires_at = self.lease.clock() + self.lease.ttl
+        try:
+            held = self.lease.acquire()
+        except Exception as error:
+            logger.error(f'Не удалось продлить аренду: {error}')
+            held = False
+        changed = held != self.held
+        if changed:
+            logger.info(
+                f'Аренда {self.lease.name}: '
+                f'{"получена" if held else "потеряна"}'
+            )
+        self._expires_at = expires_at if held else 0
+        if changed:
+            self._notify(held)
+
+    def _notify(self, held):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(held)
+        except Exception as error:
+            logger.error(f'Сбой обработчика аренды {self.lease.name}: {error}')
+
+    def stop(self):
+        """Останавливает продление и освобождает аренду."""
+        self._stopped.set()
+        held = self.held
+        if held:
+            self.lease.release()
+        self._expires_at = 0
+        if held:
+            self._notify(False)
@@ -0,0 +1,161 @@
+import atexit
+import glob
+import gzip
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """
+    Ротация лога по размеру или по времени со сжатием в gzip.
+    Файл переименовывается сразу, а сжимается в отдельном потоке.
+    Старые архивы удаляются по числу backupCount и по возрасту
+    retention секунд. Длительность ротаций копится в rollover_seconds.
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0,
+                 encoding=None, interval=0, retention=0):
+        super().__init__(filename, maxBytes=maxBytes,
+                         backupCount=backupCount, encoding=encoding,
+                         delay=True)
+        self.interval = interval
+        self.retention = retention
+        self.rollovers = 0
+        self.rollover_seconds = 0.0
+        self.max_rollover_seconds = 0.0
+        self.rollover_at = self._next_rollover()
+        self._compressor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='log-gzip'
+        )
+        self._compressing = None
+
+    def _next_rollover(self):
+        return time.time() + self.interval if self.interval else None
+
+    def namer(self, name):
+        """Добавляет к именам архивов расширение .gz."""
+        return f'{name}.gz'
+
+    def rotator(self, source, dest):
+        """Переименовывает файл и ставит его сжатие в очередь."""
+        raw = f'{dest}.raw'
+        os.rename(source, raw)
+        self._compressing = self._compressor.submit(self._compress, raw, dest)
+
+    @staticmethod
+    def _compress(raw, dest):
+        with open(raw, 'rb') as source, gzip.open(dest, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        os.remove(raw)
+
+    def shouldRollover(self, record):
+        """Проверяет размер файла и срок ротации по времени."""
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        """Выполняет ротацию и удаляет устаревшие архивы."""
+        started = time.perf_counter()
+        if self._compressing is not None:
+            self._compressing.result()
+        super().doRollover()
+        self.rollover_at = self._next_rollover()
+        if self.retention:
+            self._compressor.submit(self._remove_expired)
+        elapsed = time.perf_counter() - started
+        self.rollovers += 1
+        self.rollover_seconds += elapsed
+        self.max_rollover_seconds = max(self.max_rollover_seconds, elapsed)
+
+    def _remove_expired(self):
+        expired_before = time.time() - self.retention
+        for path in glob.glob(f'{glob.escape(self.baseFilename)}.*.gz'):
+            try:
+                if os.path.getmtime(path) < expired_before:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def close(self):
+        """Закрывает файл и дожидается сжатия архивов."""
+        super().close()
+        self._compressor.shutdown(wait=True)
+
+
+def in_background(*handlers) -> QueueHandler:
+    """
+    Переносит запись в handlers в отдельный поток.
+    Возвращает обработчик, который только кладёт запись в очередь.
+    Поток останавливается при выходе из программы.
+    """
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    handler = QueueHandler(records)
+
+    def stop():
+        atexit.unregister(stop)
+        listener.stop()
+        for file_handler in handlers:
+            file_handler.close()
+
+    atexit.register(stop)
+    handler.stop = stop
+    return handler
+
+
+def measure_stall(records=50000, max_bytes=1000000) -> dict:
+    """
+    Измеряет, насколько ротация задерживает вызовы логгера.
+    Сравнивается ротация со сжатием в фоне и ротация в том же
+    потоке, когда сжатие ждёт своей очереди. Время в миллисекундах.
+    """
+    results = {}
+    payload = 'x' * 200
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('inline', 'background'):
+            file_handler = CompressingRotatingFileHandler(
+                os.path.join(directory, f'{name}.log'),
+                maxBytes=max_bytes, backupCount=3
+            )
+            handler = file_handler
+            if name == 'background':
+                handler = in_background(file_handler)
+            test_logger = logging.getLogger(f'{__name__}.stall.{name}')
+            test_logger.propagate = False
+            test_logger.addHandler(handler)
+            calls = []
+            for number in range(records):
+                started = time.perf_counter()
+                test_logger.error('%s %s', number, payload)
+                calls.append(time.perf_counter() - started)
+            calls.sort()
+            test_logger.removeHandler(handler)
+            if name == 'background':
+                handler.stop()
+            else:
+                file_handler.close()
+            results[name] = {
+                'p99_call_ms': calls[int(len(calls) * 0.99)] * 1000,
+                'max_call_ms': calls[-1] * 1000,
+                'rollovers': file_handler.rollovers,
+                'max_rollover_ms': file_handler.max_rollover_seconds * 1000,
+            }
+    return results
+
+
+if __name__ == '__main__':
+    for name, result in measure_stall().items():
+        print(
+            f'{name}: вызов логгера p99 {result["p99_call_ms"]:.3f} мс, '
+            f'худший {result["max_call_ms"]:.2f} мс, '
+            f'ротаций {result["rollovers"]}, '
+            f'худшая ротация {result["max_rollover_ms"]:.2f} мс'
+        )
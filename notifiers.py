@@ -0,0 +1,173 @@
+import abc
+import contextvars
+import logging
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from email.message import EmailMessage
+
+import requests
+
+from outbox import DEFAULT_SINK
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_TIMEOUT = 10
+
+
+class Notifier(abc.ABC):
+    """
+    Получатель уведомлений.
+    Наследники задают уникальное имя name и реализуют send. Ошибка
+    отправки передаётся исключением, тогда сообщение останется в очереди.
+    """
+
+    name = 'notifier'
+
+    @abc.abstractmethod
+    def send(self, message, topic=None):
+        """Отправляет сообщение. topic — имя домашней работы или None."""
+
+
+class CallableNotifier(Notifier):
+    """Получатель, который отправляет сообщения функцией func."""
+
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+
+    def send(self, message, topic=None):
+        """Передаёт сообщение в func."""
+        self.func(message, topic)
+
+
+class TelegramNotifier(Notifier):
+    """Отправляет сообщения в дополнительный чат Telegram."""
+
+    def __init__(self, bot, chat_id):
+        self.name = f'telegram:{chat_id}'
+        self.bot = bot
+        self.chat_id = chat_id
+
+    def send(self, message, topic=None):
+        """Отправляет сообщение в чат chat_id."""
+        self.bot.send_message(chat_id=self.chat_id, text=message)
+
+
+class WebhookNotifier(Notifier):
+    """Отправляет сообщения POST-запросом с JSON на url."""
+
+    def __init__(self, url, timeout=NOTIFY_TIMEOUT):
+        self.name = f'webhook:{url}'
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, message, topic=None):
+        """Отправляет {'text': ..., 'homework': ...} на url."""
+        response = requests.post(
+            self.url,
+            json={'text': message, 'homework': topic},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+class SmtpNotifier(Notifier):
+    """Отправляет сообщения письмом через SMTP-сервер."""
+
+    def __init__(self, host, port, sender, recipients, username=None,
+                 password=None, starttls=False, timeout=NOTIFY_TIMEOUT):
+        self.name = f'smtp:{host}:{port}'
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def send(self, message, topic=None):
+        """Отправляет письмо всем адресатам из recipients."""
+        email = EmailMessage()
+        email['Subject'] = f'Статус работы {topic}' if topic else 'Статус'
+        email['From'] = self.sender
+        email['To'] = ', '.join(self.recipients)
+        email.set_content(message)
+        with smtplib.SMTP(self.host, self.port,
+                          timeout=self.timeout) as server:
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+            server.send_message(email)
+
+
+class Dispatcher:
+    """
+    Рассылает уведомления всем получателям через очередь outbox.
+    У каждого получателя своя очередь, очереди отправляются параллельно
+    в пуле потоков. Получатель, который не уложился в timeout, дальше
+    отправляет в фоне, а следующая рассылка его пропускает, пока он
+    не освободится.
+    """
+
+    def __init__(self, notifiers, outbox, timeout=NOTIFY_TIMEOUT):
+        names = [notifier.name for notifier in notifiers]
+        if len(set(names)) != len(names):
+            raise ValueError(f'Имена получателей повторяются: {names}')
+        self.notifiers = notifiers
+        self.outbox = outbox
+        self.timeout = timeout
+        self._running = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(len(notifiers), 1),
+            thread_name_prefix='notifier'
+        )
+
+    def put(self, key, message, topic=None):
+        """Ставит сообщение в очередь каждого получателя."""
+        for notifier in self.notifiers:
+            sink_key = (
+                key if notifier.name == DEFAULT_SINK
+                else f'{notifier.name}:{key}'
+            )
+            self.outbox.put(sink_key, message, topic=topic,
+                            sink=notifier.name)
+
+    def flush(self) -> dict:
+        """
+        Отправляет очереди всех получателей.
+        Возвращает число отправленных сообщений по именам получателей,
+        для не успевших получателей — None.
+        """
+        with self._lock:
+            for notifier in self.notifiers:
+                running = self._running.get(notifier.name)
+                if running is not None and not running.done():
+                    logger.warning(
+                        f'Получатель {notifier.name} ещё занят отправкой'
+                    )
+                    continue
+                self._running[notifier.name] = self._pool.submit(
+                    contextvars.copy_context().run,
+                    self.outbox.flush, notifier.send, notifier.name
+                )
+            running = dict(self._running)
+        wait(running.values(), timeout=self.timeout)
+        sent = {}
+        for name, future in running.items():
+            if not future.done():
+                logger.warning(f'Получатель {name} отвечает медленно')
+                sent[name] = None
+            elif future.exception() is not None:
+                logger.error(f'Сбой получателя {name}: {future.exception()}')
+                sent[name] = None
+            else:
+                sent[name] = future.result()
+        return sent
+
+    def close(self):
+        """Останавливает пул, не дожидаясь медленных получателей."""
+        self._pool.shutdown(wait=False)
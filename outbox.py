@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+
+import storage
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 20
+OUTBOX_BASE_DELAY = 60
+OUTBOX_MAX_DELAY = 3600
+OUTBOX_KEEP_SENT = 30 * 24 * 60 * 60
+DEFAULT_SINK = 'telegram'
+
+
+class Outbox:
+    """
+    Очередь исходящих сообщений в SQLite.
+    Сообщение сначала записывается в базу и только потом отправляется.
+    Ключ сообщения уникален, поэтому повторно найденный переход статуса
+    не отправляется второй раз. Дубль возможен только при падении
+    процесса между отправкой и отметкой об отправке. У каждого получателя
+    (sink) своя очередь, и сбой одного не задерживает остальных.
+    """
+
+    def __init__(self, path=None, batch_size=OUTBOX_BATCH_SIZE,
+                 base_delay=OUTBOX_BASE_DELAY, max_delay=OUTBOX_MAX_DELAY,
+                 clock=time.time):
+        self.batch_size = batch_size
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._db = storage.connect(path)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS outbox ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'key TEXT NOT NULL UNIQUE, text TEXT NOT NULL, '
+            'attempts INTEGER NOT NULL DEFAULT 0, '
+            'next_attempt_at REAL NOT NULL, sent_at REAL, topic TEXT, '
+            f"sink TEXT NOT NULL DEFAULT '{DEFAULT_SINK}')"
+        )
+        columns = [row[1] for row in self._db.execute(
+            'PRAGMA table_info(outbox)'
+        )]
+        if 'topic' not in columns:
+            self._db.execute('ALTER TABLE outbox ADD COLUMN topic TEXT')
+        if 'sink' not in columns:
+            self._db.execute(
+                'ALTER TABLE outbox ADD COLUMN sink TEXT NOT NULL '
+                f"DEFAULT '{DEFAULT_SINK}'"
+            )
+        self._db.execute(
+            'CREATE INDEX IF NOT EXISTS outbox_sink_pending '
+            'ON outbox (sink, sent_at, id)'
+        )
+
+    def put(self, key, text, topic=None, sink=DEFAULT_SINK) -> bool:
+        """
+        Сохраняет сообщение. Возвращает False, если ключ уже был.
+        topic передаётся при отправке и связывает сообщения об одном
+        предмете, например об одной домашней работе.
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                'INSERT OR IGNORE INTO outbox '
+                '(key, text, topic, sink, next_attempt_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, text, topic, sink, self.clock())
+            )
+        return cursor.rowcount == 1
+
+    def pending(self, sink=DEFAULT_SINK) -> int:
+        """Возвращает число неотправленных сообщений получателя."""
+        with self._lock:
+            count, = self._db.execute(
+                'SELECT COUNT(*) FROM outbox '
+                'WHERE sink = ? AND sent_at IS NULL', (sink,)
+            ).fetchone()
+        return count
+
+    def flush(self, deliver, sink=DEFAULT_SINK) -> int:
+        """
+        Отправляет сообщения получателя sink через deliver(text, topic).
+        Сообщения читаются пачками по batch_size, возвращается число
+        отправленных. На первой ошибке
+        отправка прерывается, чтобы не нарушить порядок сообщений,
+        а следующая попытка откладывается с экспоненциальной паузой.
+        """
+        sent = 0
+        while True:
+            with self._lock:
+                batch = self._db.execute(
+                    'SELECT id, text, topic, attempts, next_attempt_at '
+                    'FROM outbox WHERE sink = ? AND sent_at IS NULL '
+                    'ORDER BY id LIMIT ?',
+                    (sink, self.batch_size)
+                ).fetchall()
+            for message_id, text, topic, attempts, next_attempt_at in batch:
+                if next_attempt_at > self.clock():
+                    return sent
+                try:
+                    deliver(text, topic)
+                except Exception as error:
+                    self._postpone(message_id, attempts)
+                    logger.error(f'Сообщение осталось в очереди: {error}')
+                    return sent
+                self._mark_sent(message_id)
+                sent += 1
+            if len(batch) < self.batch_size:
+                self._prune()
+                return sent
+
+    def _postpone(self, message_id, attempts):
+        delay = min(self.base_delay * 2 ** attempts, self.max_delay)
+        with self._lock:
+            self._db.execute(
+                'UPDATE outbox SET attempts = attempts + 1, '
+                'next_attempt_at = ? WHERE id = ?',
+                (self.clock() + delay, message_id)
+            )
+
+    def _mark_sent(self, message_id):
+        with self._lock:
+            self._db.execute(
+                'UPDATE outbox SET sent_at = ? WHERE id = ?',
+                (self.clock(), message_id)
+            )
+
+    def _prune(self):
+        with self._lock:
+            self._db.execute(
+                'DELETE FROM outbox WHERE sent_at < ?',
+                (self.clock() - OUTBOX_KEEP_SENT,)
+            )
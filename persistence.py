@@ -0,0 +1,162 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import storage
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 5
+FLUSH_SIZE = 500
+
+_MISSING = object()
+
+
+class WriteBehind:
+    """
+    Таблица ключ-значение в SQLite с отложенной записью.
+    Изменения копятся в памяти, повторные изменения одного ключа
+    склеиваются, а на диск всё уходит одной транзакцией, когда
+    накопилось flush_size ключей или самое старое изменение ждёт
+    дольше flush_interval секунд. Это и есть граница потери данных
+    при падении процесса.
+    """
+
+    def __init__(self, table, path=None, flush_interval=FLUSH_INTERVAL,
+                 flush_size=FLUSH_SIZE, clock=time.monotonic):
+        self.table = table
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.clock = clock
+        self.commits = 0
+        self._pending = {}
+        self._oldest = None
+        self._lock = threading.RLock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._db = storage.connect(path)
+        self._db.execute(
+            f'CREATE TABLE IF NOT EXISTS {table} ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+        )
+
+    def get(self, key, default=None):
+        """Возвращает значение с учётом ещё не записанных изменений."""
+        with self._lock:
+            value = self._pending.get(key, _MISSING)
+            if value is _MISSING:
+                row = self._db.execute(
+                    f'SELECT value FROM {self.table} WHERE key = ?', (key,)
+                ).fetchone()
+                value = row[0] if row else None
+        return default if value is None else value
+
+    def put(self, key, value):
+        """Запоминает значение. None удаляет ключ."""
+        with self._lock:
+            self._pending[key] = value
+            if self._oldest is None:
+                self._oldest = self.clock()
+            if self._is_due():
+                self.flush()
+
+    def delete(self, key):
+        """Удаляет ключ."""
+        self.put(key, None)
+
+    def count(self) -> int:
+        """Возвращает число сохранённых ключей."""
+        with self._lock:
+            self.flush()
+            count, = self._db.execute(
+                f'SELECT COUNT(*) FROM {self.table}'
+            ).fetchone()
+        return count
+
+    def _is_due(self) -> bool:
+        return len(self._pending) >= self.flush_size or (
+            self._oldest is not None
+            and self.clock() - self._oldest >= self.flush_interval
+        )
+
+    def flush(self):
+        """Записывает накопленные изменения одной транзакцией."""
+        with self._lock:
+            if not self._pending:
+                return
+            changes = self._pending
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._db.executemany(
+                    f'DELETE FROM {self.table} WHERE key = ?',
+                    [(key,) for key, value in changes.items()
+                     if value is None]
+                )
+                self._db.executemany(
+                    f'INSERT OR REPLACE INTO {self.table} (key, value) '
+                    'VALUES (?, ?)',
+                    [(key, value) for key, value in changes.items()
+                     if value is not None]
+                )
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+            self.commits += 1
+            self._pending = {}
+            self._oldest = None
+
+    def start(self):
+        """Запускает фоновый сброс по времени, даже если записей нет."""
+        self._thread = threading.Thread(
+            target=self._run, name=f'write-behind-{self.table}', daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval / 2):
+            try:
+                with self._lock:
+                    if self._is_due():
+                        self.flush()
+            except Exception as error:
+                logger.error(f'Не удалось сохранить {self.table}: {error}')
+
+    def close(self):
+        """Останавливает фоновый сброс и записывает остаток."""
+        self._stopped.set()
+        self.flush()
+
+
+def benchmark(writes=20000, keys=1000) -> dict:
+    """Сравнивает запись с коммитом на каждое изменение и отложенную."""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, flush_size in (('per_write', 1), ('write_behind', 500)):
+            path = os.path.join(directory, f'{name}.db')
+            table = WriteBehind(
+                'bench', path=path, flush_size=flush_size,
+                flush_interval=float('inf')
+            )
+            started = time.perf_counter()
+            for number in range(writes):
+                table.put(f'hw{number % keys}', 'reviewing')
+            table.close()
+            elapsed = time.perf_counter() - started
+            results[name] = {
+                'writes_per_second': writes / elapsed,
+                'commits_per_second': table.commits / elapsed,
+                'commits': table.commits,
+            }
+    return results
+
+
+if __name__ == '__main__':
+    for name, result in benchmark().items():
+        print(
+            f'{name}: {result["writes_per_second"]:.0f} изменений/с, '
+            f'{result["commits_per_second"]:.0f} коммитов/с, '
+            f'всего коммитов {result["commits"]}'
+        )
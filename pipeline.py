@@ -0,0 +1,143 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_QUEUE_SIZE = 100
+PIPELINE_STOP_TIMEOUT = 5
+# Как часто ждущие очереди потоки проверяют, не остановлен ли конвейер.
+POLL_INTERVAL = 0.1
+
+
+class Stage:
+    """
+    Стадия конвейера.
+    func(item) возвращает последовательность результатов для следующей
+    стадии или None. Стадия работает в workers потоках.
+    """
+
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.processed = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed, failed):
+        """Учитывает обработку одного элемента."""
+        with self._lock:
+            self.processed += 1
+            self.errors += failed
+            self.busy_seconds += elapsed
+
+
+class Pipeline:
+    """
+    Стадии, соединённые ограниченными очередями.
+    Если следующая стадия не успевает, её очередь заполняется и
+    предыдущая стадия ждёт (backpressure). Ошибка обработки элемента
+    логируется и не останавливает стадию. Остановка не кладёт ничего
+    в очереди, поэтому не зависает, если стадия встала и её очередь
+    заполнена.
+    """
+
+    def __init__(self, stages, queue_size=PIPELINE_QUEUE_SIZE):
+        self.stages = stages
+        self.queues = [queue.Queue(queue_size) for _ in stages]
+        self.started_at = None
+        self._threads = []
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Запускает потоки всех стадий."""
+        self.started_at = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            for number in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(index,),
+                    name=f'pipeline-{stage.name}-{number}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def put(self, item, timeout=None, stage=None):
+        """
+        Передаёт элемент стадии stage, по умолчанию первой.
+        Места в очереди стадии ждёт не дольше timeout секунд, затем
+        бросает queue.Full.
+        """
+        index = 0 if stage is None else [
+            each.name for each in self.stages
+        ].index(stage)
+        self.queues[index].put((contextvars.copy_context(), item),
+                               timeout=timeout)
+
+    def _work(self, index):
+        stage = self.stages[index]
+        inbox = self.queues[index]
+        outbox = None
+        if index + 1 < len(self.queues):
+            outbox = self.queues[index + 1]
+        while not self._stopped.is_set():
+            try:
+                context, item = inbox.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            started = time.perf_counter()
+            failed = False
+            try:
+                results = context.copy().run(stage.func, item) or ()
+                for result in results:
+                    if outbox is not None:
+                        self._forward(outbox, (context, result))
+            except Exception as error:
+                failed = True
+                logger.error(f'Сбой стадии {stage.name}: {error}')
+            stage.record(time.perf_counter() - started, failed)
+            inbox.task_done()
+
+    def _forward(self, outbox, entry):
+        while not self._stopped.is_set():
+            try:
+                outbox.put(entry, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+
+    def join(self):
+        """Дожидается обработки всего, что уже передано в конвейер."""
+        for pending in self.queues:
+            pending.join()
+
+    def stop(self, timeout=PIPELINE_STOP_TIMEOUT):
+        """
+        Останавливает потоки стадий, не дожидаясь очередей.
+        Потоки, которые не закончили обработку за timeout секунд,
+        остаются работать в фоне.
+        """
+        self._stopped.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+    def report(self) -> dict:
+        """Возвращает счётчики и пропускную способность по стадиям."""
+        elapsed = time.monotonic() - self.started_at
+        return {
+            stage.name: {
+                'processed': stage.processed,
+                'errors': stage.errors,
+                'queued': pending.qsize(),
+                'per_second': stage.processed / elapsed if elapsed else 0,
+                'busy_share': (
+                    stage.busy_seconds / elapsed / stage.workers
+                    if elapsed else 0
+                ),
+            }
+            for stage, pending in zip(self.stages, self.queues)
+        }
@@ -0,0 +1,100 @@
+import hashlib
+import logging
+import threading
+import time
+
+import storage
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Ограничитель запросов по алгоритму token bucket.
+    Состояние корзин хранится в SQLite, поэтому при общем BOT_DB_PATH
+    бюджет делят все процессы. Каждый запрос берёт по жетону из общей
+    корзины и из корзины своего токена.
+    """
+
+    def __init__(self, global_rate, global_burst, token_rate, token_burst,
+                 path=None, clock=time.time, sleep=None):
+        self.limits = {
+            'global': (global_rate, global_burst),
+            'token': (token_rate, token_burst),
+        }
+        self.clock = clock
+        self.sleep = sleep
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+        self._db = storage.connect(path)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS rate_buckets ('
+            'name TEXT PRIMARY KEY, tokens REAL NOT NULL, '
+            'updated_at REAL NOT NULL)'
+        )
+
+    def _buckets(self, token):
+        digest = hashlib.sha256(str(token).encode()).hexdigest()[:16]
+        return {
+            'global': self.limits['global'],
+            f'token:{digest}': self.limits['token'],
+        }
+
+    def try_acquire(self, token) -> float:
+        """
+        Берёт жетоны для запроса с токеном token.
+        Возвращает 0 при успехе или сколько секунд нужно подождать.
+        """
+        buckets = self._buckets(token)
+        now = self.clock()
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                levels = {}
+                for name, (rate, burst) in buckets.items():
+                    row = self._db.execute(
+                        'SELECT tokens, updated_at FROM rate_buckets '
+                        'WHERE name = ?', (name,)
+                    ).fetchone()
+                    tokens, updated_at = row if row else (burst, now)
+                    levels[name] = min(
+                        burst, tokens + (now - updated_at) * rate
+                    )
+                delay = max(
+                    (1 - levels[name]) / buckets[name][0]
+                    for name in buckets
+                )
+                if delay <= 0:
+                    self._db.executemany(
+                        'INSERT OR REPLACE INTO rate_buckets '
+                        '(name, tokens, updated_at) VALUES (?, ?, ?)',
+                        [(name, level - 1, now)
+                         for name, level in levels.items()]
+                    )
+            finally:
+                self._db.execute('COMMIT')
+        return max(delay, 0)
+
+    def acquire(self, token):
+        """Ждёт, пока лимиты позволят сделать запрос с токеном token."""
+        waited = 0.0
+        delay = self.try_acquire(token)
+        while delay:
+            waited += delay
+            (self.sleep or time.sleep)(delay)
+            delay = self.try_acquire(token)
+        self.acquired += 1
+        if waited:
+            self.waits += 1
+            self.wait_seconds += waited
+            logger.debug(f'Ожидание лимита запросов к API: {waited:.2f} с')
+
+    def stats(self) -> dict:
+        """Возвращает счётчики ожидания лимита."""
+        return {
+            'acquired': self.acquired,
+            'waits': self.waits,
+            'wait_seconds': self.wait_seconds,
+        }
@@ -0,0 +1,166 @@
+import hashlib
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+POLL_PERIOD = 600
+POLL_JITTER = 0.1
+POLL_WORKERS = 8
+
+
+class PollScheduler:
+    """
+    Планировщик опросов по ближайшему сроку (earliest deadline first).
+    Сроки следующих опросов всех арендаторов лежат в куче, поэтому
+    добавление, перенос и выборка стоят O(log n). Первый опрос
+    арендатора сдвигается на стабильную фазу внутри периода, каждый
+    следующий — на случайную долю jitter, чтобы опросы не сбивались
+    в одну точку. Если новый срок оказывается ближайшим, run
+    просыпается и не ждёт до прежнего срока.
+    """
+
+    def __init__(self, period=POLL_PERIOD, jitter=POLL_JITTER,
+                 clock=time.time, seed=None):
+        self.period = period
+        self.jitter = jitter
+        self.clock = clock
+        self._heap = []
+        self._deadlines = {}
+        self._counter = itertools.count()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def __contains__(self, tenant):
+        return tenant in self._deadlines
+
+    def _phase(self, tenant) -> float:
+        digest = hashlib.blake2b(str(tenant).encode(), digest_size=8)
+        return int.from_bytes(digest.digest(), 'big') / 2 ** 64 * self.period
+
+    def _push(self, tenant, deadline):
+        self._deadlines[tenant] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), tenant))
+        if self._heap[0][2] == tenant:
+            self._wakeup.set()
+
+    def wake(self):
+        """Будит run, чтобы он заново проверил сроки и stop."""
+        self._wakeup.set()
+
+    def add(self, tenant):
+        """Добавляет арендатора с первым опросом в пределах периода."""
+        with self._lock:
+            self._push(tenant, self.clock() + self._phase(tenant))
+
+    def remove(self, tenant):
+        """Убирает арендатора. Запись в куче удаляется лениво."""
+        with self._lock:
+            self._deadlines.pop(tenant, None)
+
+    def tenants(self) -> list:
+        """Возвращает всех арендаторов в расписании."""
+        with self._lock:
+            return list(self._deadlines)
+
+    def reschedule(self, tenant):
+        """Назначает следующий опрос через период с разбросом."""
+        spread = self._random.uniform(-self.jitter, self.jitter)
+        with self._lock:
+            if tenant in self._deadlines:
+                self._push(tenant, self.clock() + self.period * (1 + spread))
+
+    def next_deadline(self):
+        """Возвращает ближайший срок опроса или None."""
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None) -> list:
+        """Забирает арендаторов, срок опроса которых наступил."""
+        now = self.clock() if now is None else now
+        due = []
+        with self._lock:
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                deadline, _, tenant = heapq.heappop(self._heap)
+                due.append(tenant)
+                self._drop_stale()
+        return due
+
+    def _drop_stale(self):
+        while self._heap:
+            deadline, _, tenant = self._heap[0]
+            if self._deadlines.get(tenant) == deadline:
+                return
+            heapq.heappop(self._heap)
+
+    def run(self, poll, workers=POLL_WORKERS, stop=None):
+        """
+        Раздаёт наступившие опросы пулу потоков до установки stop.
+        poll(tenant) выполняется в пуле, после него опрос переносится.
+        Чтобы остановка не ждала ближайшего срока, после stop.set()
+        нужно вызвать wake().
+        """
+        stop = stop or threading.Event()
+        in_flight = set()
+
+        def done(tenant):
+            in_flight.discard(tenant)
+            self.reschedule(tenant)
+            if stop.is_set():
+                self.wake()
+
+        def task(tenant):
+            try:
+                poll(tenant)
+            except Exception as error:
+                logger.error(f'Сбой опроса {tenant}: {error}')
+            finally:
+                done(tenant)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while not stop.is_set():
+                self._wakeup.clear()
+                for tenant in self.pop_due():
+                    if tenant not in in_flight:
+                        in_flight.add(tenant)
+                        pool.submit(task, tenant)
+                deadline = self.next_deadline()
+                timeout = (
+                    self.period if deadline is None
+                    else max(deadline - self.clock(), 0)
+                )
+                self._wakeup.wait(min(timeout, self.period))
+
+
+def benchmark(tenants=100000, rounds=3) -> float:
+    """Возвращает среднее время на один опрос в микросекундах."""
+    now = [0.0]
+    scheduler = PollScheduler(clock=lambda: now[0], seed=0)
+    for tenant in range(tenants):
+        scheduler.add(tenant)
+    operations = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        horizon = now[0] + scheduler.period
+        while now[0] < horizon:
+            now[0] += 1
+            for tenant in scheduler.pop_due():
+                scheduler.reschedule(tenant)
+                operations += 1
+    elapsed = time.perf_counter() - started
+    return elapsed / operations * 1e6
+
+
+if __name__ == '__main__':
+    print(f'100k арендаторов: {benchmark():.2f} мкс на опрос')
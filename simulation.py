@@ -0,0 +1,243 @@
+import argparse
+import json
+import logging
+import random
+import statistics
+from datetime import datetime, timezone
+
+import homework
+from notifiers import CallableNotifier, Dispatcher
+from outbox import DEFAULT_SINK, Outbox
+from state import HomeworkState
+
+DAY = 24 * 60 * 60
+
+
+class VirtualClock:
+    """Часы, время которых двигает только sleep."""
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def __call__(self):
+        """Возвращает текущее виртуальное время."""
+        return self.now
+
+    time = __call__
+
+    def sleep(self, seconds):
+        """Мгновенно переводит часы вперёд."""
+        self.now += seconds
+
+
+class ApiResponse:
+    """Ответ API в том виде, в каком его разбирает parse_api_body."""
+
+    def __init__(self, data):
+        self.content = json.dumps(data).encode()
+
+    def json(self):
+        """Разбирает тело ответа."""
+        return json.loads(self.content)
+
+
+def to_iso(timestamp) -> str:
+    """Переводит время в формат date_updated API Практикума."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        '%Y-%m-%dT%H:%M:%SZ'
+    )
+
+
+class SyntheticApi:
+    """
+    Синтетический API Практикума.
+    Каждая работа проходит reviewing -> rejected -> reviewing ->
+    approved через случайные промежутки. В интервалы outages API
+    отвечает ошибкой.
+    """
+
+    def __init__(self, homeworks=10, days=14, start=0.0, outages=(),
+                 seed=0):
+        rng = random.Random(seed)
+        self.outages = list(outages)
+        self.events = []
+        for number in range(homeworks):
+            moment = start + rng.uniform(0, days * DAY / 2)
+            for status in ('reviewing', 'rejected', 'reviewing', 'approved'):
+                self.events.append((moment, number, status))
+                moment += rng.expovariate(1 / DAY)
+        self.events.sort()
+        self.requests = 0
+
+    def get(self, now, from_date) -> dict:
+        """Возвращает ответ API на момент now."""
+        self.requests += 1
+        if any(start <= now < end for start, end in self.outages):
+            raise Exception('Код ответа API: 503')
+        latest = {}
+        for moment, number, status in self.events:
+            if moment > now:
+                break
+            latest[number] = (moment, status)
+        homeworks = [
+            {
+                'id': number,
+                'homework_name': f'username__hw{number:02d}.zip',
+                'status': status,
+                'date_updated': to_iso(moment),
+            }
+            for number, (moment, status) in sorted(
+                latest.items(), key=lambda item: item[1], reverse=True
+            )
+            if moment >= from_date
+        ]
+        return {'homeworks': homeworks, 'current_date': int(now)}
+
+
+class RecordedApi:
+    """
+    Повтор записанных ответов API из файла JSONL.
+    Каждая строка — {"time": ..., "response": {...}} или
+    {"time": ..., "error": "..."}. На запрос возвращается последняя
+    запись не позже текущего времени.
+    """
+
+    def __init__(self, path):
+        with open(path, encoding='utf-8') as records:
+            self.records = sorted(
+                (json.loads(line) for line in records if line.strip()),
+                key=lambda record: record['time']
+            )
+        self.requests = 0
+
+    def get(self, now, from_date) -> dict:
+        """Возвращает записанный ответ на момент now."""
+        self.requests += 1
+        current = None
+        for record in self.records:
+            if record['time'] > now:
+                break
+            current = record
+        if current is None or 'error' in current:
+            raise Exception(current['error'] if current else 'Нет записи')
+        return current['response']
+
+
+def simulate(api, start, end, period=homework.RETRY_PERIOD) -> dict:
+    """
+    Прогоняет цикл бота в виртуальном времени от start до end.
+    Каждая итерация — homework.run_iteration, как в main() без конвейера:
+    с пропуском неизменных ответов и работ, состоянием и очередью
+    уведомлений. Вместо запроса к API берётся ответ api на текущий
+    момент. Лимиты запросов и аренда не моделируются: симулируется одна
+    реплика. Состояние и очередь лежат во временной базе.
+    """
+    clock = VirtualClock(start)
+    deliveries = []
+    state = HomeworkState(max_items=homework.STATE_MAX_ITEMS, path='')
+    dispatcher = Dispatcher([CallableNotifier(
+        DEFAULT_SINK,
+        lambda text, topic: deliveries.append((clock.now, topic, text))
+    )], Outbox(path='', clock=clock))
+
+    def fetch(timestamp):
+        return homework.parse_api_body(
+            ApiResponse(api.get(clock.now, timestamp)),
+            homework.PRACTICUM_TOKEN
+        )
+
+    errors = 0
+    homework.response_digests.clear()
+    logging.disable(logging.ERROR)
+    try:
+        while clock.now < end:
+            errors += not homework.run_iteration(
+                int(start), state, dispatcher, fetch
+            )
+            clock.sleep(period)
+    finally:
+        logging.disable(logging.NOTSET)
+        dispatcher.close()
+        state.close()
+        homework.response_digests.clear()
+    return report(api, deliveries, errors, end)
+
+
+def report(api, deliveries, errors, end) -> dict:
+    """
+    Собирает число запросов, задержки уведомлений и дубли.
+    Для синтетического API, где известно время каждого перехода, дубль —
+    сообщение, которому не соответствует ни один ещё не доставленный
+    переход, и считаются задержки и пропуски. Для записанных ответов
+    дубль — сообщение о работе с тем же текстом, что и предыдущее.
+    """
+    duplicates = 0
+    delays = []
+    missed = None
+    if isinstance(api, SyntheticApi):
+        pending = {}
+        for moment, number, status in api.events:
+            pending.setdefault(f'username__hw{number:02d}.zip', []).append(
+                (moment, homework.HOMEWORK_VERDICTS[status])
+            )
+        for delivered_at, topic, text in deliveries:
+            for index, (moment, verdict) in enumerate(pending[topic]):
+                if text.endswith(verdict) and moment <= delivered_at:
+                    delays.append(delivered_at - moment)
+                    del pending[topic][:index + 1]
+                    break
+            else:
+                duplicates += 1
+        missed = sum(
+            moment <= end for events in pending.values()
+            for moment, _ in events
+        )
+    else:
+        last_sent = {}
+        for _, topic, text in deliveries:
+            duplicates += last_sent.get(topic) == text
+            last_sent[topic] = text
+    delays.sort()
+    p95 = delays[int(len(delays) * 0.95)] if delays else None
+    return {
+        'requests': api.requests,
+        'errors': errors,
+        'notifications': len(deliveries),
+        'duplicates': duplicates,
+        'missed': missed,
+        'delay_mean': round(statistics.mean(delays)) if delays else None,
+        'delay_p95': round(p95) if delays else None,
+        'delay_max': round(delays[-1]) if delays else None,
+    }
+
+
+def main():
+    """Запускает симуляцию из командной строки."""
+    parser = argparse.ArgumentParser(
+        description='Прогон опроса API в виртуальном времени.'
+    )
+    parser.add_argument('--days', type=float, default=14)
+    parser.add_argument('--homeworks', type=int, default=10)
+    parser.add_argument('--period', type=float, default=homework.RETRY_PERIOD)
+    parser.add_argument('--outage', type=float, nargs=2, action='append',
+                        default=[], metavar=('START', 'END'),
+                        help='интервал недоступности API в днях')
+    parser.add_argument('--recorded', help='файл JSONL с ответами API')
+    args = parser.parse_args()
+    start = 0.0
+    end = start + args.days * DAY
+    if args.recorded:
+        api = RecordedApi(args.recorded)
+        start = api.records[0]['time'] if api.records else start
+        end = start + args.days * DAY
+    else:
+        api = SyntheticApi(
+            homeworks=args.homeworks, days=args.days, start=start,
+            outages=[(a * DAY, b * DAY) for a, b in args.outage]
+        )
+    for key, value in simulate(api, start, end, args.period).items():
+        print(f'{key}: {value}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Склеивает одновременные вызовы с одинаковым ключом.
+    Первый вызов выполняет функцию, остальные ждут и получают тот же
+    результат или то же исключение. Результат общий, менять его нельзя.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.saved = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """Вызывает func или присоединяется к уже идущему вызову."""
+        with self._lock:
+            call = self._flights.get(key)
+            leader = call is None
+            if leader:
+                call = self._flights[key] = _Call()
+                self.calls += 1
+            else:
+                self.saved += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> dict:
+        """Возвращает число выполненных и сэкономленных вызовов."""
+        return {'calls': self.calls, 'saved': self.saved}
@@ -0,0 +1,98 @@
+import threading
+import tracemalloc
+from collections import OrderedDict
+
+from digests import HomeworkDigests
+from history import HomeworkHistory
+from persistence import FLUSH_INTERVAL, FLUSH_SIZE, WriteBehind
+
+TERMINAL_STATUSES = frozenset({'approved'})
+
+
+class HomeworkState:
+    """
+    Хранит последний известный статус каждой домашней работы.
+    Все статусы сохраняются на диск с отложенной записью, а в памяти
+    держится не больше max_items записей. При переполнении первыми
+    вытесняются давно не использованные завершённые работы, затем давно
+    не использованные остальные.
+    """
+
+    def __init__(self, max_items=1000, path=None,
+                 flush_interval=FLUSH_INTERVAL, flush_size=FLUSH_SIZE):
+        self.max_items = max_items
+        self.digests = HomeworkDigests(max_items)
+        self.history = HomeworkHistory(path)
+        self._active = OrderedDict()
+        self._finished = OrderedDict()
+        self._lock = threading.Lock()
+        self._cold = WriteBehind(
+            'homework_states', path=path,
+            flush_interval=flush_interval, flush_size=flush_size
+        )
+
+    def __len__(self):
+        return len(self._active) + len(self._finished)
+
+    def get(self, name):
+        """Возвращает статус работы или None, если работа неизвестна."""
+        with self._lock:
+            for tier in (self._active, self._finished):
+                if name in tier:
+                    tier.move_to_end(name)
+                    return tier[name]
+        return self._cold.get(name)
+
+    def set(self, name, status):
+        """Запоминает новый статус работы."""
+        with self._lock:
+            self._active.pop(name, None)
+            self._finished.pop(name, None)
+            if status in TERMINAL_STATUSES:
+                self._finished[name] = status
+            else:
+                self._active[name] = status
+            self._cold.put(name, status)
+            while len(self) > self.max_items:
+                tier = self._finished or self._active
+                tier.popitem(last=False)
+
+    def start(self):
+        """Запускает фоновое сохранение статусов."""
+        self._cold.start()
+
+    def close(self):
+        """Сохраняет статусы, которые ещё не записаны."""
+        self._cold.close()
+
+    def report(self) -> dict:
+        """Возвращает размеры горячего уровня и число сохранённых работ."""
+        with self._lock:
+            return {
+                'active': len(self._active),
+                'finished': len(self._finished),
+                'stored': self._cold.count(),
+                'max_items': self.max_items,
+            }
+
+
+def bytes_per_homework(samples=10000) -> float:
+    """
+    Измеряет расход памяти на одну работу в HomeworkState.
+    Замер делается через tracemalloc на синтетических работах.
+    """
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    state = HomeworkState(max_items=samples, path='')
+    before, _ = tracemalloc.get_traced_memory()
+    for number in range(samples):
+        state.set(f'username__hw{number:08d}.zip', 'reviewing')
+    after, _ = tracemalloc.get_traced_memory()
+    if not started:
+        tracemalloc.stop()
+    return (after - before) / samples
+
+
+if __name__ == '__main__':
+    print(f'Байт на одну работу: {bytes_per_homework():.1f}')
@@ -0,0 +1,32 @@
+import os
+import sqlite3
+
+# По умолчанию состояние бота, в том числе очередь неотправленных
+# сообщений, лежит в файле и переживает перезапуск. Пустой путь SQLite
+# понимает как временную базу на диске, которая удаляется при закрытии
+# соединения.
+DEFAULT_DB_PATH = 'bot.db'
+SQLITE_TIMEOUT = 30
+
+
+def db_path() -> str:
+    """
+    Возвращает путь к базе из BOT_DB_PATH.
+    Переменная читается при каждом вызове, чтобы учитывался .env,
+    загруженный после импорта модуля.
+    """
+    return os.getenv('BOT_DB_PATH', DEFAULT_DB_PATH)
+
+
+def connect(path=None) -> sqlite3.Connection:
+    """Открывает соединение с локальной базой бота."""
+    path = db_path() if path is None else path
+    connection = sqlite3.connect(
+        path,
+        timeout=SQLITE_TIMEOUT,
+        isolation_level=None,
+        check_same_thread=False
+    )
+    if path not in ('', ':memory:'):
+        connection.execute('PRAGMA journal_mode=WAL')
+    return connection
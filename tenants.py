@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from cryptography.fernet import Fernet
+
+import storage
+from exceptions import TenantRegistrationException
+from scheduler import POLL_WORKERS, PollScheduler
+
+logger = logging.getLogger(__name__)
+
+Tenant = namedtuple('Tenant', ('chat_id', 'token', 'registered_at'))
+
+
+def token_hash(token) -> str:
+    """Возвращает хэш токена для поиска без расшифровки."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def chat_sink(chat_id) -> str:
+    """Имя очереди outbox для чата арендатора."""
+    return f'chat:{chat_id}'
+
+
+class TenantRegistry:
+    """
+    Реестр арендаторов: чат Telegram и токен Практикума.
+    Токены хранятся зашифрованными ключом key (Fernet), для поиска по
+    токену рядом лежит его SHA-256. Поиск по чату идёт по первичному
+    ключу, по токену — по уникальному индексу, поэтому оба стоят
+    O(log n) при любом числе арендаторов.
+    """
+
+    def __init__(self, key, path=None, clock=time.time):
+        self._fernet = Fernet(key)
+        self.clock = clock
+        self._db = storage.connect(path)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS tenants ('
+            'chat_id TEXT PRIMARY KEY, '
+            'token_hash TEXT NOT NULL UNIQUE, '
+            'token BLOB NOT NULL, '
+            'registered_at REAL NOT NULL)'
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute(
+                'SELECT COUNT(*) FROM tenants'
+            ).fetchone()[0]
+
+    def register(self, chat_id, token) -> Tenant:
+        """
+        Регистрирует токен за чатом или заменяет токен чата.
+        Токен, уже занятый другим чатом, не регистрируется: это
+        проверяет уникальный индекс, поэтому одновременная регистрация
+        из разных чатов или реплик не отнимет токен у первого чата.
+        """
+        chat_id = str(chat_id)
+        tenant = Tenant(chat_id, token, self.clock())
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._db.execute(
+                    'INSERT INTO tenants '
+                    '(chat_id, token_hash, token, registered_at) '
+                    'VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (chat_id) DO UPDATE SET '
+                    'token_hash = excluded.token_hash, '
+                    'token = excluded.token, '
+                    'registered_at = excluded.registered_at',
+                    (chat_id, token_hash(token),
+                     self._fernet.encrypt(token.encode()),
+                     tenant.registered_at)
+                )
+            except sqlite3.IntegrityError:
+                self._db.execute('ROLLBACK')
+                raise TenantRegistrationException(
+                    'токен уже зарегистрирован в другом чате'
+                )
+            self._db.execute('COMMIT')
+        logger.info(f'Зарегистрирован арендатор {chat_id}')
+        return tenant
+
+    def unregister(self, chat_id) -> bool:
+        """Удаляет арендатора. Возвращает, был ли он в реестре."""
+        with self._lock:
+            deleted = self._db.execute(
+                'DELETE FROM tenants WHERE chat_id = ?', (str(chat_id),)
+            ).rowcount
+        if deleted:
+            logger.info(f'Удалён арендатор {chat_id}')
+        return bool(deleted)
+
+    def _tenant(self, row):
+        if row is None:
+            return None
+        chat_id, token, registered_at = row
+        return Tenant(
+            chat_id, self._fernet.decrypt(token).decode(), registered_at
+        )
+
+    def get(self, chat_id):
+        """Возвращает арендатора по чату или None."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT chat_id, token, registered_at FROM tenants '
+                'WHERE chat_id = ?', (str(chat_id),)
+            ).fetchone()
+        return self._tenant(row)
+
+    def find_by_token(self, token):
+        """Возвращает арендатора по токену или None."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT chat_id, token, registered_at FROM tenants '
+                'WHERE token_hash = ?', (token_hash(token),)
+            ).fetchone()
+        return self._tenant(row)
+
+    def chat_ids(self) -> list:
+        """Возвращает чаты всех арендаторов."""
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                'SELECT chat_id FROM tenants'
+            )]
+
+
+class TenantQueue:
+    """
+    Очередь уведомлений одного арендатора в общем outbox.
+    Повторяет Dispatcher.put, чтобы check_homeworks не отличал
+    арендатора от основного чата.
+    """
+
+    def __init__(self, outbox, chat_id):
+        self.outbox = outbox
+        self.chat_id = chat_id
+        self.sink = chat_sink(chat_id)
+
+    def put(self, key, message, topic=None):
+        """Ставит сообщение в очередь чата."""
+        self.outbox.put(f'{self.sink}:{key}', message, topic=topic,
+                        sink=self.sink)
+
+    def flush(self, deliver) -> int:
+        """Отправляет очередь чата функцией deliver(text, topic)."""
+        return self.outbox.flush(deliver, self.sink)
+
+
+class TenantRunner:
+    """
+    Опрашивает арендаторов из реестра по расписанию PollScheduler.
+    Реестр сверяется с расписанием раз в sync_interval, поэтому
+    арендаторы, добавленные другой репликой, тоже начинают опрашиваться
+    без перезапуска.
+    """
+
+    def __init__(self, registry, poll, period, workers=POLL_WORKERS,
+                 sync_interval=60, scheduler=None):
+        self.registry = registry
+        self.poll = poll
+        self.workers = workers
+        self.sync_interval = sync_interval
+        self.scheduler = scheduler or PollScheduler(period=period)
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def add(self, chat_id):
+        """Ставит арендатора в расписание."""
+        if chat_id not in self.scheduler:
+            self.scheduler.add(chat_id)
+
+    def remove(self, chat_id):
+        """Убирает арендатора из расписания."""
+        self.scheduler.remove(chat_id)
+
+    def sync(self):
+        """Приводит расписание в соответствие с реестром."""
+        registered = set(self.registry.chat_ids())
+        for chat_id in registered:
+            self.add(chat_id)
+        for chat_id in set(self.scheduler.tenants()) - registered:
+            self.remove(chat_id)
+
+    def _sync_forever(self):
+        while not self._stopped.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as error:
+                logger.error(f'Не удалось сверить реестр: {error}')
+
+    def start(self):
+        """Запускает опросы и сверку реестра в фоновых потоках."""
+        self.sync()
+        self._threads = [
+            threading.Thread(
+                target=self.scheduler.run, name='tenants', daemon=True,
+                args=(self.poll, self.workers, self._stopped)
+            ),
+            threading.Thread(
+                target=self._sync_forever, name='tenants-sync', daemon=True
+            ),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Останавливает опросы."""
+        self._stopped.set()
+        self.scheduler.wake()
+        for thread in self._threads:
+            thread.join()
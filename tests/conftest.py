@@ -25,4 +25,6 @@ pytest_plugins = [
 os.environ['PRACTICUM_TOKEN'] = 'sometoken'
 os.environ['TELEGRAM_TOKEN'] = '1234:abcdefg'
 os.environ['TELEGRAM_CHAT_ID'] = '12345'
+# Тесты не должны писать в bot.db рабочего каталога.
+os.environ['BOT_DB_PATH'] = ''
 
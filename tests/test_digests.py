@@ -0,0 +1,111 @@
+import pytest
+import requests
+
+from digests import HomeworkDigests, ResponseDigests, UnchangedResponse
+from notifiers import CallableNotifier, Dispatcher
+from outbox import Outbox
+from state import HomeworkState
+from utils import RawResponse
+
+
+class TestDigests:
+
+    def test_response_digests(self):
+        digests = ResponseDigests()
+        response = {'homeworks': [], 'current_date': 1}
+        assert not digests.unchanged('token', response)
+        digests.remember('token', response)
+        assert digests.unchanged('token', {**response, 'current_date': 2}), (
+            'current_date меняется в каждом ответе и не должен '
+            'влиять на сравнение.'
+        )
+        assert not digests.unchanged('token', {'homeworks': [{'id': 1}]})
+        assert digests.stats() == {'hits': 1, 'hit_rate': 1 / 3}
+
+    def test_response_digests_bounded(self):
+        digests = ResponseDigests(max_items=2)
+        for token in ('a', 'b', 'c'):
+            digests.remember(token, {'homeworks': []})
+        assert len(digests) == 2
+        assert not digests.unchanged('a', {'homeworks': []}), (
+            'Давно не обновлявшиеся токены должны вытесняться.'
+        )
+
+    def test_homework_digests_lru(self):
+        digests = HomeworkDigests(max_items=1)
+        first = {'homework_name': 'hw1', 'status': 'reviewing'}
+        second = {'homework_name': 'hw2', 'status': 'reviewing'}
+        digests.remember(first)
+        assert digests.unchanged(dict(first))
+        assert not digests.unchanged({**first, 'status': 'approved'})
+        digests.remember(second)
+        assert not digests.unchanged(first), (
+            'Давно не виденные работы должны вытесняться.'
+        )
+
+
+class TestFastPath:
+
+    def test_unchanged_body_skips_processing(self, monkeypatch,
+                                             homework_module):
+        data = {
+            'homeworks': [{'homework_name': 'hw_fast', 'status': 'approved'}],
+            'current_date': 1,
+        }
+        dates = iter(range(1, 100))
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: RawResponse(
+                {**data, 'current_date': next(dates)}
+            )
+        )
+        monkeypatch.setattr(homework_module.rate_limiter, 'acquire',
+                            lambda token: None)
+        checked = []
+        check_response = homework_module.check_response
+        monkeypatch.setattr(
+            homework_module, 'check_response',
+            lambda response: checked.append(check_response(response))
+        )
+        homework_module.response_digests.clear()
+        hits = homework_module.response_digests.hits
+        sent = []
+        dispatcher = Dispatcher([CallableNotifier(
+            'telegram', lambda text, topic: sent.append(topic)
+        )], Outbox())
+        state = HomeworkState()
+        for _ in range(3):
+            homework_module.poll_homeworks(0, state, dispatcher)
+            dispatcher.flush()
+        dispatcher.close()
+        assert sent == ['hw_fast']
+        assert len(checked) == 1, (
+            'Повторный ответ не должен проверяться заново, даже если '
+            'изменился только current_date.'
+        )
+        assert homework_module.response_digests.hits - hits == 2
+
+    def test_failed_delivery_forgets_response(self, homework_module):
+        homework_module.response_digests.clear()
+        response = {
+            'homeworks': [{'homework_name': 'hw_fail', 'status': 'approved'}],
+            'current_date': 1,
+        }
+        homework_module.parse_api_body(RawResponse(response),
+                                       homework_module.PRACTICUM_TOKEN)
+
+        class BrokenDispatcher:
+            def put(self, *args, **kwargs):
+                raise Exception('База недоступна')
+
+        homework = response['homeworks'][0]
+        with pytest.raises(Exception):
+            homework_module.deliver_stage(
+                HomeworkState(), BrokenDispatcher(),
+                (homework, homework_module.parse_status(homework))
+            )
+        assert not isinstance(
+            homework_module.parse_api_body(RawResponse(response),
+                                           homework_module.PRACTICUM_TOKEN),
+            UnchangedResponse
+        ), 'После сбоя доставки тот же ответ нужно обработать заново.'
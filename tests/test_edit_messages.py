@@ -0,0 +1,54 @@
+import pytest
+
+from persistence import WriteBehind
+from utils import FakeBot
+
+
+@pytest.fixture
+def edit_mode(monkeypatch, homework_module):
+    monkeypatch.setattr(homework_module, 'EDIT_STATUS_MESSAGES', True)
+    return homework_module
+
+
+class TestEditStatusMessages:
+
+    def test_second_status_edits_first_message(self, edit_mode):
+        bot = FakeBot()
+        status_messages = WriteBehind('status_messages')
+        edit_mode.deliver_message(bot, 'reviewing', 'hw1', status_messages)
+        edit_mode.deliver_message(bot, 'approved', 'hw1', status_messages)
+        assert bot.sent == ['reviewing']
+        assert bot.edited == [(101, 'approved')], (
+            'Новый статус работы должен менять уже отправленное сообщение.'
+        )
+
+    def test_mapping_survives_restart(self, edit_mode, tmp_path):
+        path = str(tmp_path / 'bot.db')
+        bot = FakeBot()
+        edit_mode.deliver_message(
+            bot, 'reviewing', 'hw1',
+            WriteBehind('status_messages', path=path, flush_size=1)
+        )
+        edit_mode.deliver_message(
+            bot, 'approved', 'hw1', WriteBehind('status_messages', path=path)
+        )
+        assert bot.edited == [(101, 'approved')]
+
+    def test_new_message_when_edit_fails(self, edit_mode):
+        bot = FakeBot(broken_edit=True)
+        status_messages = WriteBehind('status_messages')
+        edit_mode.deliver_message(bot, 'reviewing', 'hw1', status_messages)
+        edit_mode.deliver_message(bot, 'approved', 'hw1', status_messages)
+        assert bot.sent == ['reviewing', 'approved']
+        assert status_messages.get('hw1') == '102'
+
+    def test_disabled_by_default(self, homework_module):
+        bot = FakeBot()
+        status_messages = WriteBehind('status_messages')
+        homework_module.deliver_message(
+            bot, 'reviewing', 'hw1', status_messages
+        )
+        homework_module.deliver_message(
+            bot, 'approved', 'hw1', status_messages
+        )
+        assert bot.sent == ['reviewing', 'approved']
@@ -0,0 +1,112 @@
+import sqlite3
+
+import pytest
+import requests
+
+import history as history_module
+from history import HomeworkHistory, benchmark, terms
+from notifiers import CallableNotifier, Dispatcher
+from outbox import Outbox
+from state import HomeworkState
+from utils import FakeBot, command
+
+
+class TestHomeworkHistory:
+
+    def test_terms(self):
+        assert terms('username__hw05_final.zip') == ['hw05', 'final']
+        assert terms('Sprint 3: API') == ['sprint', '3', 'api']
+
+    def test_search_by_word_prefixes(self):
+        history = HomeworkHistory()
+        history.record('', 'hw05_final', 'reviewing', '2024-01-01T10:00:00Z')
+        history.record('', 'hw05_final', 'approved', '2024-01-02T10:00:00Z')
+        history.record('', 'hw06_api', 'reviewing', '2024-01-03T10:00:00Z')
+        assert history.search('', 'hw05') == [('hw05_final', [
+            ('reviewing', '2024-01-01T10:00:00Z'),
+            ('approved', '2024-01-02T10:00:00Z'),
+        ])]
+        assert [name for name, _ in history.search('', 'hw')] == [
+            'hw05_final', 'hw06_api'
+        ]
+        assert history.search('', 'fin hw05')[0][0] == 'hw05_final', (
+            'Работа должна находиться по началу каждого слова запроса.'
+        )
+        assert history.search('', 'fin api') == []
+        assert history.search('', '') == []
+
+    def test_owners_are_separate(self):
+        history = HomeworkHistory()
+        history.record('', 'hw05_final', 'approved', '2024-01-02T10:00:00Z')
+        history.record('42', 'hw05_final', 'reviewing', '2024-01-01T10:00:00Z')
+        history.record('42', 'hw05_final', 'reviewing', '2024-01-01T10:00:00Z')
+        assert history.search('42', 'hw05') == [
+            ('hw05_final', [('reviewing', '2024-01-01T10:00:00Z')])
+        ], 'Повтор перехода не должен попадать в историю дважды.'
+        assert history.search('7', 'hw05') == [], (
+            'Чат не должен видеть работы других арендаторов.'
+        )
+
+    def test_failed_record_is_rolled_back(self, monkeypatch, tmp_path):
+        path = str(tmp_path / 'bot.db')
+        history = HomeworkHistory(path)
+
+        def broken_terms(text):
+            raise sqlite3.OperationalError('disk I/O error')
+
+        monkeypatch.setattr(history_module, 'terms', broken_terms)
+        with pytest.raises(sqlite3.OperationalError):
+            history.record('', 'hw05_final', 'approved',
+                           '2024-01-02T10:00:00Z')
+        monkeypatch.undo()
+        assert not sqlite3.connect(path).execute(
+            'SELECT * FROM transitions'
+        ).fetchall(), 'Переход без записи в индекс не должен сохраняться.'
+        history.record('', 'hw05_final', 'approved', '2024-01-02T10:00:00Z')
+        assert history.search('', 'final') == [
+            ('hw05_final', [('approved', '2024-01-02T10:00:00Z')])
+        ]
+
+    def test_benchmark_leaves_bot_db(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delenv('BOT_DB_PATH')
+        assert benchmark(homeworks=10, queries=10) > 0
+        assert not list(tmp_path.iterdir()), (
+            'Замер не должен писать в базу бота.'
+        )
+
+
+class TestHistoryCommand:
+
+    def test_transitions_are_indexed(self, monkeypatch, homework_module):
+        state = HomeworkState()
+        dispatcher = Dispatcher(
+            [CallableNotifier('telegram', lambda text, topic: None)], Outbox()
+        )
+        for status, date_updated in (
+            ('reviewing', '2024-01-01T10:00:00Z'),
+            ('approved', '2024-01-02T10:00:00Z'),
+        ):
+            homework_module.check_homeworks([{
+                'homework_name': 'username__hw05_final.zip',
+                'status': status,
+                'date_updated': date_updated,
+            }], state, dispatcher)
+        dispatcher.close()
+        monkeypatch.setattr(requests, 'get', pytest.fail)
+        bot = FakeBot()
+        homework_module.history_command(
+            state.history,
+            *command(bot, homework_module.TELEGRAM_CHAT_ID, 'final')
+        )
+        text, = bot.sent
+        assert 'hw05_final' in text
+        assert homework_module.HOMEWORK_VERDICTS['approved'] in text
+        assert homework_module.HOMEWORK_VERDICTS['reviewing'] in text
+
+    def test_nothing_found(self, homework_module):
+        bot = FakeBot()
+        homework_module.history_command(
+            HomeworkHistory(), *command(bot, 42, 'hw99')
+        )
+        assert 'не найдены' in bot.sent[0]
@@ -0,0 +1,89 @@
+from lease import Lease, LeaseKeeper
+from notifiers import CallableNotifier, Dispatcher
+from outbox import Outbox
+from state import HomeworkState
+from utils import FakeClock
+
+
+class TestLease:
+
+    def test_only_one_owner(self, tmp_path):
+        path = str(tmp_path / 'bot.db')
+        clock = FakeClock(1000.0)
+        first = Lease('tenant', ttl=30, owner='a', path=path, clock=clock)
+        second = Lease('tenant', ttl=30, owner='b', path=path, clock=clock)
+        assert first.acquire()
+        assert not second.acquire(), (
+            'Пока аренда действует, вторая реплика не должна её получить.'
+        )
+        assert first.acquire(), 'Владелец должен продлевать свою аренду.'
+
+    def test_failover_after_expiry(self, tmp_path):
+        path = str(tmp_path / 'bot.db')
+        clock = FakeClock(1000.0)
+        first = Lease('tenant', ttl=30, owner='a', path=path, clock=clock)
+        second = Lease('tenant', ttl=30, owner='b', path=path, clock=clock)
+        first.acquire()
+        clock.now += 31
+        assert second.acquire(), (
+            'После истечения срока аренду должна получить другая реплика.'
+        )
+        assert not first.acquire()
+
+    def test_release(self, tmp_path):
+        path = str(tmp_path / 'bot.db')
+        first = Lease('tenant', owner='a', path=path)
+        second = Lease('tenant', owner='b', path=path)
+        keeper = LeaseKeeper(first)
+        keeper.start()
+        assert keeper.held
+        keeper.stop()
+        assert not keeper.held
+        assert second.acquire(), 'Остановка должна освобождать аренду.'
+
+    def test_on_change(self, tmp_path):
+        path = str(tmp_path / 'bot.db')
+        changes = []
+        first = LeaseKeeper(Lease('tenant', owner='a', path=path),
+                            on_change=changes.append)
+        second = LeaseKeeper(Lease('tenant', owner='b', path=path),
+                             on_change=changes.append)
+        first.start()
+        second.start()
+        assert changes == [True], (
+            'Обработчик должен вызываться только у держателя аренды.'
+        )
+        first.stop()
+        second.stop()
+        assert changes == [True, False]
+
+
+class TestFailover:
+
+    def test_replicas_share_transitions(self, tmp_path, homework_module):
+        path = str(tmp_path / 'bot.db')
+        sent = []
+        dispatcher = Dispatcher(
+            [CallableNotifier('telegram', lambda text, topic: sent.append(
+                text
+            ))],
+            Outbox(path)
+        )
+        first = HomeworkState(path=path)
+        second = HomeworkState(path=path)
+        for state, status, date_updated in (
+            (second, 'reviewing', '2024-01-01T10:00:00Z'),
+            (first, 'rejected', '2024-01-02T10:00:00Z'),
+            (second, 'reviewing', '2024-01-03T10:00:00Z'),
+        ):
+            homework_module.check_homeworks([{
+                'homework_name': 'hw1',
+                'status': status,
+                'date_updated': date_updated,
+            }], state, dispatcher)
+        dispatcher.flush()
+        dispatcher.close()
+        assert len(sent) == 3, (
+            'Реплика, вернувшая аренду, не должна сравнивать статус '
+            'с устаревшим статусом в своей памяти.'
+        )
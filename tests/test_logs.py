@@ -0,0 +1,75 @@
+import gzip
+import logging
+import os
+import time
+
+from logs import CompressingRotatingFileHandler, in_background
+
+
+def make_logger(name, handler):
+    test_logger = logging.getLogger(f'test_logs.{name}')
+    test_logger.propagate = False
+    test_logger.addHandler(handler)
+    return test_logger
+
+
+class TestCompressingRotatingFileHandler:
+
+    def test_rolled_files_are_gzipped(self, tmp_path):
+        path = tmp_path / 'main.log'
+        handler = CompressingRotatingFileHandler(
+            str(path), maxBytes=100, backupCount=2
+        )
+        test_logger = make_logger('gzip', handler)
+        for number in range(10):
+            test_logger.error('запись %s %s', number, 'x' * 40)
+        handler.close()
+        test_logger.removeHandler(handler)
+        archives = sorted(tmp_path.glob('main.log.*'))
+        assert [archive.name for archive in archives] == [
+            'main.log.1.gz', 'main.log.2.gz'
+        ], 'Должно остаться backupCount сжатых архивов.'
+        with gzip.open(archives[0], 'rt') as archive:
+            assert 'запись 8' in archive.read()
+
+    def test_rollover_by_time(self, tmp_path):
+        path = tmp_path / 'main.log'
+        handler = CompressingRotatingFileHandler(
+            str(path), backupCount=2, interval=60
+        )
+        test_logger = make_logger('time', handler)
+        test_logger.error('первая')
+        handler.rollover_at = time.time() - 1
+        test_logger.error('вторая')
+        handler.close()
+        test_logger.removeHandler(handler)
+        assert handler.rollovers == 1
+        assert (tmp_path / 'main.log.1.gz').exists()
+
+    def test_expired_archives_removed(self, tmp_path):
+        path = tmp_path / 'main.log'
+        old_archive = tmp_path / 'main.log.5.gz'
+        old_archive.write_bytes(b'')
+        os.utime(old_archive, (0, 0))
+        handler = CompressingRotatingFileHandler(
+            str(path), maxBytes=10, backupCount=10, retention=60
+        )
+        test_logger = make_logger('retention', handler)
+        test_logger.error('x' * 20)
+        test_logger.error('x' * 20)
+        handler.close()
+        test_logger.removeHandler(handler)
+        archives = list(tmp_path.glob('main.log.*.gz'))
+        assert archives, 'Свежие архивы удаляться не должны.'
+        assert all(archive.stat().st_mtime > 0 for archive in archives), (
+            'Архивы старше retention должны удаляться.'
+        )
+
+    def test_in_background(self, tmp_path):
+        path = tmp_path / 'main.log'
+        handler = in_background(CompressingRotatingFileHandler(str(path)))
+        test_logger = make_logger('background', handler)
+        test_logger.error('из очереди')
+        handler.stop()
+        test_logger.removeHandler(handler)
+        assert 'из очереди' in path.read_text()
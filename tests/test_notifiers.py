@@ -0,0 +1,142 @@
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from notifiers import (CallableNotifier, Dispatcher, Notifier, SmtpNotifier,
+                       WebhookNotifier)
+from outbox import Outbox
+
+
+class WebhookStandIn(BaseHTTPRequestHandler):
+    received = []
+
+    def do_POST(self):
+        length = int(self.headers['Content-Length'])
+        self.received.append(json.loads(self.rfile.read(length)))
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class SmtpStandIn(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер, который запоминает тела писем."""
+
+    received = []
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 localhost')
+        while True:
+            command = self.rfile.readline().decode().strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 localhost')
+            elif command.startswith(('MAIL', 'RCPT', 'RSET', 'NOOP')):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                for line in iter(self.rfile.readline, b'.\r\n'):
+                    lines.append(line.decode())
+                self.received.append(''.join(lines))
+                self.reply('250 OK')
+            else:
+                self.reply('221 Bye')
+                return
+
+
+@pytest.fixture
+def webhook_url():
+    WebhookStandIn.received = []
+    server = HTTPServer(('127.0.0.1', 0), WebhookStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}/hook'
+    server.shutdown()
+
+
+@pytest.fixture
+def smtp_port():
+    SmtpStandIn.received = []
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SmtpStandIn)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+
+
+class TestDispatcher:
+
+    def test_fan_out_to_webhook_and_smtp(self, webhook_url, smtp_port):
+        chat = []
+        dispatcher = Dispatcher([
+            CallableNotifier('telegram', lambda text, _: chat.append(text)),
+            WebhookNotifier(webhook_url),
+            SmtpNotifier('127.0.0.1', smtp_port, 'bot@localhost',
+                         ['student@localhost']),
+        ], Outbox())
+        dispatcher.put('hw1:approved', 'Работа принята', topic='hw1')
+        sent = dispatcher.flush()
+        assert set(sent.values()) == {1}
+        assert chat == ['Работа принята']
+        assert WebhookStandIn.received == [
+            {'text': 'Работа принята', 'homework': 'hw1'}
+        ]
+        assert 'Subject: =?utf-8?' in SmtpStandIn.received[0]
+
+    def test_failing_sink_is_isolated(self):
+        chat = []
+
+        def broken(text, topic):
+            raise ConnectionError('недоступен')
+
+        outbox = Outbox()
+        dispatcher = Dispatcher([
+            CallableNotifier('telegram', lambda text, _: chat.append(text)),
+            CallableNotifier('broken', broken),
+        ], outbox)
+        dispatcher.put('a', 'первое')
+        dispatcher.put('b', 'второе')
+        sent = dispatcher.flush()
+        assert sent == {'telegram': 2, 'broken': 0}
+        assert chat == ['первое', 'второе'], (
+            'Сбой одного получателя не должен задерживать остальных.'
+        )
+        assert outbox.pending('broken') == 2
+
+    def test_slow_sink_does_not_block_flush(self):
+        release = threading.Event()
+        dispatcher = Dispatcher([
+            CallableNotifier('telegram', lambda text, topic: None),
+            CallableNotifier('slow', lambda text, topic: release.wait(5)),
+        ], Outbox(), timeout=0.1)
+        dispatcher.put('a', 'текст')
+        started = time.monotonic()
+        sent = dispatcher.flush()
+        assert time.monotonic() - started < 2
+        assert sent == {'telegram': 1, 'slow': None}
+        assert dispatcher.flush()['slow'] is None, (
+            'Занятый получатель не должен запускаться повторно.'
+        )
+        release.set()
+        dispatcher.close()
+
+    def test_duplicate_names_rejected(self):
+        with pytest.raises(ValueError):
+            Dispatcher([
+                CallableNotifier('same', print),
+                CallableNotifier('same', print),
+            ], Outbox())
+
+    def test_incomplete_notifier_rejected(self):
+        class Silent(Notifier):
+            name = 'silent'
+
+        with pytest.raises(TypeError):
+            Silent()
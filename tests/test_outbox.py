@@ -0,0 +1,85 @@
+import pytest
+
+from outbox import Outbox
+from utils import FakeClock
+
+
+class FlakyChat:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.messages = []
+        self.topics = []
+
+    def send(self, text, topic=None):
+        if self.failures:
+            self.failures -= 1
+            raise Exception('Telegram недоступен')
+        self.messages.append(text)
+        self.topics.append(topic)
+
+
+class TestOutbox:
+
+    def test_duplicate_key_ignored(self):
+        outbox = Outbox()
+        assert outbox.put('hw:approved', 'first')
+        assert not outbox.put('hw:approved', 'second')
+        chat = FlakyChat()
+        outbox.flush(chat.send)
+        outbox.flush(chat.send)
+        assert chat.messages == ['first']
+
+    def test_failed_message_is_retried_with_backoff(self):
+        clock = FakeClock()
+        outbox = Outbox(clock=clock, base_delay=10)
+        outbox.put('a', 'first')
+        outbox.put('b', 'second')
+        chat = FlakyChat(failures=2)
+        assert outbox.flush(chat.send) == 0
+        assert outbox.pending() == 2, 'Неотправленное не должно теряться.'
+        clock.now = 5
+        assert outbox.flush(chat.send) == 0
+        clock.now = 10
+        assert outbox.flush(chat.send) == 0
+        clock.now = 29
+        assert outbox.flush(chat.send) == 0
+        clock.now = 30
+        assert outbox.flush(chat.send) == 2
+        assert chat.messages == ['first', 'second'], (
+            'Сообщения должны доставляться в порядке постановки.'
+        )
+
+    @pytest.mark.parametrize('batch_size', [1, 3, 50])
+    def test_flush_in_batches(self, batch_size):
+        outbox = Outbox(batch_size=batch_size)
+        for number in range(7):
+            outbox.put(str(number), str(number))
+        chat = FlakyChat()
+        assert outbox.flush(chat.send) == 7
+        assert chat.messages == [str(number) for number in range(7)]
+
+    def test_topic_is_passed_to_deliver(self):
+        outbox = Outbox()
+        outbox.put('a', 'text', topic='hw1')
+        outbox.put('b', 'text')
+        chat = FlakyChat()
+        outbox.flush(chat.send)
+        assert chat.topics == ['hw1', None]
+
+    def test_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'bot.db')
+        Outbox(path=path).put('a', 'text')
+        chat = FlakyChat()
+        assert Outbox(path=path).flush(chat.send) == 1
+        assert chat.messages == ['text']
+
+    def test_persistent_by_default(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delenv('BOT_DB_PATH')
+        Outbox().put('a', 'text')
+        chat = FlakyChat()
+        assert Outbox().flush(chat.send) == 1, (
+            'Без BOT_DB_PATH очередь должна храниться в файле и '
+            'переживать перезапуск.'
+        )
+        assert (tmp_path / 'bot.db').exists()
@@ -0,0 +1,40 @@
+from persistence import WriteBehind
+from utils import FakeClock
+
+
+class TestWriteBehind:
+
+    def test_changes_are_coalesced(self, tmp_path):
+        path = str(tmp_path / 'bot.db')
+        table = WriteBehind('kv', path=path, flush_size=3,
+                           flush_interval=60, clock=FakeClock())
+        for status in ('reviewing', 'rejected', 'approved'):
+            table.put('hw1', status)
+        table.put('hw2', 'reviewing')
+        assert table.commits == 0, (
+            'Изменения одного ключа должны склеиваться в памяти.'
+        )
+        assert table.get('hw1') == 'approved'
+        table.put('hw3', 'reviewing')
+        assert table.commits == 1
+        assert WriteBehind('kv', path=path).get('hw1') == 'approved'
+
+    def test_flush_by_time(self, tmp_path):
+        clock = FakeClock()
+        table = WriteBehind('kv', path=str(tmp_path / 'bot.db'),
+                           flush_interval=5, clock=clock)
+        table.put('hw1', 'reviewing')
+        clock.now = 4
+        table.put('hw2', 'reviewing')
+        assert table.commits == 0
+        clock.now = 5
+        table.put('hw3', 'reviewing')
+        assert table.commits == 1
+
+    def test_delete(self):
+        table = WriteBehind('kv')
+        table.put('hw1', 'reviewing')
+        table.flush()
+        table.delete('hw1')
+        assert table.get('hw1') is None
+        assert table.count() == 0
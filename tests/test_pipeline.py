@@ -0,0 +1,145 @@
+import threading
+import time
+
+from notifiers import CallableNotifier, Dispatcher
+from outbox import Outbox
+from pipeline import Pipeline, Stage
+from state import HomeworkState
+
+
+class TestPipeline:
+
+    def test_items_flow_through_stages(self):
+        results = []
+        pipeline = Pipeline([
+            Stage('split', lambda text: text.split()),
+            Stage('upper', lambda word: [word.upper()], workers=3),
+            Stage('collect', results.append),
+        ])
+        pipeline.start()
+        pipeline.put('раз два три')
+        pipeline.put('четыре')
+        pipeline.join()
+        pipeline.stop()
+        assert sorted(results) == ['ДВА', 'РАЗ', 'ТРИ', 'ЧЕТЫРЕ']
+        report = pipeline.report()
+        assert report['split']['processed'] == 2
+        assert report['upper']['processed'] == 4
+        assert report['collect']['processed'] == 4
+
+    def test_error_does_not_stop_stage(self):
+        results = []
+
+        def parse(text):
+            return [int(text)]
+
+        pipeline = Pipeline([
+            Stage('parse', parse), Stage('collect', results.append)
+        ])
+        pipeline.start()
+        for text in ('1', 'x', '2'):
+            pipeline.put(text)
+        pipeline.join()
+        pipeline.stop()
+        assert results == [1, 2]
+        assert pipeline.report()['parse']['errors'] == 1
+
+    def test_backpressure(self):
+        release = threading.Event()
+        pipeline = Pipeline([
+            Stage('slow', lambda item: release.wait(5) and None),
+        ], queue_size=1)
+        pipeline.start()
+        pipeline.put(1)
+        pipeline.put(2, timeout=1)
+        blocked = threading.Thread(target=pipeline.put, args=(3,))
+        blocked.start()
+        blocked.join(0.1)
+        assert blocked.is_alive(), (
+            'При заполненной очереди передача должна ждать.'
+        )
+        release.set()
+        blocked.join(5)
+        pipeline.join()
+        pipeline.stop()
+
+    def test_stop_with_stuck_stage(self):
+        release = threading.Event()
+        pipeline = Pipeline([
+            Stage('fetch', lambda item: [item]),
+            Stage('stuck', lambda item: release.wait(5) and None),
+        ], queue_size=1)
+        pipeline.start()
+        for item in range(4):
+            pipeline.put(item, timeout=1)
+        started = time.monotonic()
+        pipeline.stop(timeout=0.5)
+        assert time.monotonic() - started < 2, (
+            'Остановка не должна зависать на заполненной очереди.'
+        )
+        release.set()
+
+
+class TestHomeworkPipeline:
+
+    def test_status_changes_are_delivered(self, monkeypatch,
+                                          homework_module):
+        response = {
+            'homeworks': [
+                {'homework_name': 'hw1', 'status': 'approved'},
+                {'homework_name': 'hw2', 'status': 'reviewing'},
+            ],
+            'current_date': 0,
+        }
+        monkeypatch.setattr(
+            homework_module, 'get_api_answer', lambda timestamp: response
+        )
+        sent = []
+        dispatcher = Dispatcher([CallableNotifier(
+            'telegram', lambda text, topic: sent.append(topic)
+        )], Outbox())
+        state = HomeworkState()
+        state.set('hw2', 'reviewing')
+        pipeline = homework_module.build_pipeline(state, dispatcher)
+        pipeline.start()
+        pipeline.put(0)
+        pipeline.put(0)
+        pipeline.join()
+        pipeline.stop()
+        dispatcher.close()
+        assert sent == ['hw1'], (
+            'Конвейер должен отправлять только изменившиеся статусы.'
+        )
+        assert state.get('hw1') == 'approved'
+
+    def test_hung_fetch_does_not_hold_up_outbox(self, monkeypatch,
+                                                homework_module):
+        release = threading.Event()
+        monkeypatch.setattr(homework_module, 'get_api_answer',
+                            lambda timestamp: release.wait(5))
+        sent = threading.Event()
+        dispatcher = Dispatcher([CallableNotifier(
+            'telegram', lambda text, topic: sent.set()
+        )], Outbox())
+        dispatcher.put('queued', 'Сообщение из очереди')
+        pipeline = homework_module.build_pipeline(HomeworkState(), dispatcher)
+        pipeline.start()
+        homework_module.feed_pipeline(pipeline, 0)
+        assert sent.wait(5), (
+            'Очередь уведомлений должна отправляться, пока опрос API висит.'
+        )
+        release.set()
+        pipeline.stop()
+        dispatcher.close()
+
+    def test_full_queue_does_not_block_main_loop(self, monkeypatch,
+                                                 homework_module):
+        monkeypatch.setattr(homework_module, 'PIPELINE_PUT_TIMEOUT', 0.01)
+        pipeline = Pipeline(
+            [Stage('fetch', lambda item: None),
+             Stage('deliver', lambda item: None)],
+            queue_size=1
+        )
+        for timestamp in range(3):
+            homework_module.feed_pipeline(pipeline, timestamp)
+        assert [pending.qsize() for pending in pipeline.queues] == [1, 1]
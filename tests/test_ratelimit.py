@@ -0,0 +1,50 @@
+from ratelimit import RateLimiter
+from utils import FakeClock
+
+
+class TestRateLimiter:
+
+    def make_limiter(self, clock, path=None, **kwargs):
+        limits = dict(global_rate=10, global_burst=10,
+                      token_rate=1, token_burst=2)
+        limits.update(kwargs)
+        return RateLimiter(path=path, clock=clock, sleep=clock.sleep,
+                           **limits)
+
+    def test_token_burst_then_wait(self):
+        clock = FakeClock()
+        limiter = self.make_limiter(clock)
+        assert limiter.try_acquire('a') == 0
+        assert limiter.try_acquire('a') == 0
+        assert limiter.try_acquire('a') == 1, (
+            'После исчерпания корзины токена нужно ждать пополнения.'
+        )
+        assert limiter.try_acquire('b') == 0, (
+            'Лимит одного токена не должен задерживать другие токены.'
+        )
+
+    def test_global_limit(self):
+        clock = FakeClock()
+        limiter = self.make_limiter(clock, global_rate=1, global_burst=1)
+        assert limiter.try_acquire('a') == 0
+        assert limiter.try_acquire('b') == 1
+
+    def test_acquire_records_wait(self):
+        clock = FakeClock()
+        limiter = self.make_limiter(clock, token_burst=1)
+        limiter.acquire('a')
+        limiter.acquire('a')
+        assert clock.now == 1
+        assert limiter.stats() == {
+            'acquired': 2, 'waits': 1, 'wait_seconds': 1.0
+        }
+
+    def test_budget_shared_through_database(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / 'bot.db')
+        first = self.make_limiter(clock, path=path, token_burst=1)
+        second = self.make_limiter(clock, path=path, token_burst=1)
+        assert first.try_acquire('a') == 0
+        assert second.try_acquire('a') > 0, (
+            'Процессы с общей базой должны делить бюджет запросов.'
+        )
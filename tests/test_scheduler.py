@@ -0,0 +1,88 @@
+import threading
+import time
+
+from scheduler import PollScheduler
+
+
+class TestPollScheduler:
+
+    def make_scheduler(self, **kwargs):
+        now = [0.0]
+        scheduler = PollScheduler(clock=lambda: now[0], seed=0, **kwargs)
+        return scheduler, now
+
+    def test_first_polls_spread_over_period(self):
+        scheduler, now = self.make_scheduler(period=100)
+        for tenant in range(1000):
+            scheduler.add(tenant)
+        now[0] = 50
+        due = scheduler.pop_due()
+        assert 300 < len(due) < 700, (
+            'Первые опросы должны распределяться по всему периоду.'
+        )
+
+    def test_earliest_deadline_first(self):
+        scheduler, now = self.make_scheduler(period=100, jitter=0)
+        for tenant in range(10):
+            scheduler.add(tenant)
+        now[0] = 100
+        due = scheduler.pop_due()
+        deadlines = [scheduler._phase(tenant) for tenant in due]
+        assert deadlines == sorted(deadlines)
+        for tenant in due:
+            scheduler.reschedule(tenant)
+        assert scheduler.pop_due() == []
+        assert 100 < scheduler.next_deadline() <= 200
+
+    def test_jitter_bounds(self):
+        scheduler, now = self.make_scheduler(period=100, jitter=0.1)
+        scheduler.add('tenant')
+        now[0] = 100
+        assert scheduler.pop_due() == ['tenant']
+        scheduler.reschedule('tenant')
+        assert 190 <= scheduler.next_deadline() <= 210
+
+    def test_removed_tenant_is_not_polled(self):
+        scheduler, now = self.make_scheduler(period=100)
+        scheduler.add('tenant')
+        scheduler.remove('tenant')
+        now[0] = 100
+        assert scheduler.pop_due() == []
+        assert scheduler.next_deadline() is None
+
+    def test_run_polls_in_pool(self):
+        scheduler = PollScheduler(period=60, jitter=0)
+        scheduler._phase = lambda tenant: 0
+        stop = threading.Event()
+        polled = []
+
+        def poll(tenant):
+            polled.append(tenant)
+            if len(polled) == 3:
+                stop.set()
+
+        for tenant in range(3):
+            scheduler.add(tenant)
+        scheduler.run(poll, workers=2, stop=stop)
+        assert sorted(polled) == [0, 1, 2]
+
+    def test_added_tenant_wakes_run(self):
+        scheduler = PollScheduler(period=60, jitter=0)
+        scheduler._phase = lambda tenant: 0 if tenant == 'near' else 50
+        stop = threading.Event()
+        polled = threading.Event()
+        scheduler.add('far')
+        thread = threading.Thread(
+            target=scheduler.run, args=(lambda tenant: polled.set(), 1, stop),
+            daemon=True
+        )
+        thread.start()
+        time.sleep(0.1)
+        scheduler.add('near')
+        assert polled.wait(5), (
+            'Новый арендатор с близким сроком не должен ждать прежнего.'
+        )
+        stop.set()
+        scheduler.wake()
+        thread.join(5)
+        assert not thread.is_alive()
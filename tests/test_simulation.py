@@ -0,0 +1,77 @@
+import json
+
+import homework
+from simulation import (DAY, RecordedApi, SyntheticApi, VirtualClock,
+                        simulate, to_iso)
+
+
+class TestSimulation:
+
+    def test_virtual_clock(self):
+        clock = VirtualClock(100)
+        clock.sleep(600)
+        assert clock() == clock.time() == 700
+
+    def test_synthetic_weeks_without_duplicates(self):
+        api = SyntheticApi(homeworks=5, days=14)
+        result = simulate(api, 0, 14 * DAY, period=600)
+        assert result['requests'] == 14 * DAY // 600
+        assert result['duplicates'] == 0
+        assert result['missed'] == 0
+        assert result['delay_max'] <= 600, (
+            'Без сбоев задержка уведомления не больше периода опроса.'
+        )
+
+    def test_outage_delays_notifications(self):
+        result = simulate(SyntheticApi(outages=[(DAY, 2 * DAY)], days=3),
+                          0, 3 * DAY, period=600)
+        assert result['errors'] == DAY // 600
+        assert result['delay_max'] > 600, (
+            'Переходы во время сбоя API должны приходить с опозданием.'
+        )
+        assert result['duplicates'] == 0
+
+    def test_period_trades_requests_for_delay(self):
+        fast = simulate(SyntheticApi(days=3), 0, 3 * DAY, period=300)
+        slow = simulate(SyntheticApi(days=3), 0, 3 * DAY, period=1200)
+        assert slow['requests'] < fast['requests']
+        assert slow['delay_max'] > fast['delay_max']
+
+    def test_production_database_untouched(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delenv('BOT_DB_PATH')
+        simulate(SyntheticApi(days=1), 0, DAY)
+        assert not list(tmp_path.iterdir()), (
+            'Симуляция не должна писать в базу бота.'
+        )
+
+    def test_drives_run_iteration(self, monkeypatch):
+        calls = []
+        run_iteration = homework.run_iteration
+        monkeypatch.setattr(homework, 'run_iteration', lambda *args: (
+            calls.append(args) or run_iteration(*args)
+        ))
+        simulate(SyntheticApi(days=1), 0, DAY)
+        assert len(calls) == DAY // 600, (
+            'Каждая итерация симуляции должна выполнять run_iteration.'
+        )
+
+    def test_recorded_responses(self, tmp_path):
+        path = tmp_path / 'responses.jsonl'
+        records = [
+            {'time': 0, 'response': {'homeworks': [], 'current_date': 0}},
+            {'time': 1000, 'error': 'Код ответа API: 500'},
+            {'time': 2000, 'response': {
+                'homeworks': [{
+                    'homework_name': 'hw1', 'status': 'approved',
+                    'date_updated': to_iso(1500),
+                }],
+                'current_date': 2000,
+            }},
+        ]
+        path.write_text('\n'.join(json.dumps(record) for record in records))
+        result = simulate(RecordedApi(str(path)), 0, 3000, period=600)
+        assert result['requests'] == 5
+        assert result['errors'] == 2
+        assert result['notifications'] == 1
+        assert result['duplicates'] == 0
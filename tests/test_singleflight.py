@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_result(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+
+        def slow_fetch():
+            started.set()
+            release.wait(5)
+            return {'homeworks': []}
+
+        def caller():
+            results.append(flight.do(('token', 1), slow_fetch))
+
+        leader = threading.Thread(target=caller)
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=caller) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while flight.saved < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        assert flight.saved == 3, (
+            'Одновременные вызовы должны ждать первый запрос.'
+        )
+        for thread in [leader] + followers:
+            thread.join(5)
+        assert len(results) == 4
+        assert all(result is results[0] for result in results)
+        assert flight.stats() == {'calls': 1, 'saved': 3}
+
+    def test_sequential_calls_are_not_merged(self):
+        flight = SingleFlight()
+        flight.do('key', lambda: 1)
+        flight.do('key', lambda: 2)
+        assert flight.stats() == {'calls': 2, 'saved': 0}
+
+    def test_error_is_raised(self):
+        flight = SingleFlight()
+
+        def broken():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            flight.do('key', broken)
+        assert flight.do('key', lambda: 'ok') == 'ok'
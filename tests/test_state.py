@@ -0,0 +1,57 @@
+from state import HomeworkState, bytes_per_homework
+
+
+class TestHomeworkState:
+
+    def test_unknown_homework(self):
+        state = HomeworkState(max_items=2)
+        assert state.get('hw1') is None
+
+    def test_finished_evicted_first(self):
+        state = HomeworkState(max_items=2)
+        state.set('hw1', 'approved')
+        state.set('hw2', 'reviewing')
+        state.set('hw3', 'rejected')
+        report = state.report()
+        assert report['active'] == 2 and report['finished'] == 0, (
+            'Завершённые работы должны вытесняться раньше остальных.'
+        )
+        assert report['stored'] == 3
+        assert state.get('hw1') == 'approved', (
+            'Вытесненная работа должна читаться из холодного уровня.'
+        )
+
+    def test_lru_order(self):
+        state = HomeworkState(max_items=2)
+        state.set('hw1', 'reviewing')
+        state.set('hw2', 'reviewing')
+        state.get('hw1')
+        state.set('hw3', 'reviewing')
+        report = state.report()
+        assert report['active'] == 2 and report['stored'] == 3, (
+            'Одна работа должна уйти из памяти и остаться в базе.'
+        )
+        assert state.get('hw2') == 'reviewing'
+
+    def test_status_update_leaves_cold_tier(self):
+        state = HomeworkState(max_items=1)
+        state.set('hw1', 'reviewing')
+        state.set('hw2', 'reviewing')
+        state.set('hw1', 'rejected')
+        assert state.get('hw1') == 'rejected'
+        assert state.get('hw2') == 'reviewing'
+
+    def test_statuses_survive_restart(self, tmp_path):
+        path = str(tmp_path / 'bot.db')
+        state = HomeworkState(path=path, flush_size=100)
+        state.set('hw1', 'rejected')
+        state.close()
+        assert HomeworkState(path=path).get('hw1') == 'rejected'
+
+    def test_bytes_per_homework(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delenv('BOT_DB_PATH')
+        assert bytes_per_homework(samples=100) > 0
+        assert not list(tmp_path.iterdir()), (
+            'Замер не должен писать в базу бота.'
+        )
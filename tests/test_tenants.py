@@ -0,0 +1,214 @@
+import sqlite3
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+import requests
+from cryptography.fernet import Fernet
+
+from exceptions import TenantRegistrationException
+from lease import Lease, LeaseKeeper, connect_leases
+from outbox import Outbox
+from persistence import WriteBehind
+from scheduler import PollScheduler
+from state import HomeworkState
+from tenants import TenantRegistry, TenantRunner, chat_sink
+from utils import FakeBot, RawResponse, command
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return TenantRegistry(Fernet.generate_key(), str(tmp_path / 'bot.db'))
+
+
+class TestTenantRegistry:
+
+    def test_register_and_lookup(self, registry):
+        registry.register(1, 'token-1')
+        registry.register('2', 'token-2')
+        assert len(registry) == 2
+        assert registry.get('1').token == 'token-1'
+        assert registry.find_by_token('token-2').chat_id == '2'
+        assert registry.get('3') is None
+        assert sorted(registry.chat_ids()) == ['1', '2']
+
+    def test_tokens_are_encrypted(self, registry, tmp_path):
+        registry.register('1', 'secret-token')
+        raw = sqlite3.connect(str(tmp_path / 'bot.db')).execute(
+            'SELECT token_hash, token FROM tenants'
+        ).fetchall()
+        assert b'secret-token' not in raw[0][1]
+        assert 'secret-token' not in raw[0][0], (
+            'Токен не должен храниться в открытом виде.'
+        )
+
+    def test_token_belongs_to_one_chat(self, registry):
+        registry.register('1', 'token')
+        with pytest.raises(TenantRegistrationException):
+            registry.register('2', 'token')
+        registry.register('1', 'new-token')
+        assert registry.find_by_token('token') is None, (
+            'Новый токен чата должен заменять старый.'
+        )
+
+    def test_concurrent_registration_keeps_owner(self, tmp_path):
+        key = Fernet.generate_key()
+        path = str(tmp_path / 'bot.db')
+        first = TenantRegistry(key, path)
+        second = TenantRegistry(key, path)
+        first.register('A', 'token')
+        with pytest.raises(TenantRegistrationException):
+            second.register('B', 'token')
+        assert first.chat_ids() == ['A'], (
+            'Токен не должен переходить к чату, зарегистрировавшему '
+            'его вторым.'
+        )
+
+    def test_unregister(self, registry):
+        registry.register('1', 'token')
+        assert registry.unregister('1')
+        assert not registry.unregister('1')
+        assert len(registry) == 0
+
+
+class TestTenantRunner:
+
+    def test_sync_follows_registry(self, registry):
+        runner = TenantRunner(registry, poll=None, period=600,
+                              scheduler=PollScheduler(seed=0))
+        registry.register('1', 'token-1')
+        registry.register('2', 'token-2')
+        runner.sync()
+        assert sorted(runner.scheduler.tenants()) == ['1', '2']
+        registry.unregister('1')
+        runner.sync()
+        assert runner.scheduler.tenants() == ['2'], (
+            'Удалённые из реестра чаты не должны опрашиваться.'
+        )
+
+
+class TestTenantPolling:
+
+    def test_poll_tenant(self, monkeypatch, homework_module, registry):
+        data = {
+            'homeworks': [{'id': 1, 'homework_name': 'hw_tenant',
+                           'status': 'approved'}],
+            'current_date': 1,
+        }
+        headers = []
+
+        def get(*args, **kwargs):
+            headers.append(kwargs['headers'])
+            return RawResponse(data)
+
+        monkeypatch.setattr(requests, 'get', get)
+        monkeypatch.setattr(homework_module.rate_limiter, 'acquire',
+                            lambda token: None)
+        registry.register('42', 'tenant-token')
+        bot = FakeBot()
+        outbox = Outbox()
+        leases = connect_leases()
+        for _ in range(2):
+            homework_module.poll_tenant(
+                registry, HomeworkState(), outbox, bot,
+                WriteBehind('status_messages'), leases, '42'
+            )
+        assert headers[0] == {'Authorization': 'OAuth tenant-token'}
+        assert bot.chat_ids == ['42'], (
+            'Арендатор должен получить одно сообщение в свой чат.'
+        )
+        assert outbox.pending(chat_sink('42')) == 0
+
+    def test_lease_splits_tenants(self, monkeypatch, homework_module,
+                                  registry):
+        monkeypatch.setattr(requests, 'get', pytest.fail)
+        registry.register('42', 'tenant-token')
+        leases = connect_leases()
+        Lease(homework_module.tenant_lease_name('tenant-token'),
+              owner='other', db=leases).acquire()
+        homework_module.poll_tenant(
+            registry, HomeworkState(), Outbox(), FakeBot(),
+            WriteBehind('status_messages'), leases, '42'
+        )
+
+
+class TestCommands:
+
+    def test_register(self, monkeypatch, homework_module, registry):
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: RawResponse(
+                {'homeworks': [], 'current_date': 1}
+            )
+        )
+        monkeypatch.setattr(homework_module.rate_limiter, 'acquire',
+                            lambda token: None)
+        runner = TenantRunner(registry, poll=None, period=600)
+        bot = FakeBot()
+        update, context = command(bot, 42, 'tenant-token')
+        homework_module.register_command(registry, runner, update, context)
+        assert update.effective_message.deleted, (
+            'Сообщение с токеном должно удаляться из чата.'
+        )
+        assert registry.get('42').token == 'tenant-token'
+        assert '42' in runner.scheduler
+        homework_module.unregister_command(
+            registry, runner, *command(bot, 42)
+        )
+        assert registry.get('42') is None
+        assert '42' not in runner.scheduler
+
+    def test_register_rejected_token(self, monkeypatch, homework_module,
+                                     registry):
+        monkeypatch.setattr(
+            requests, 'get',
+            lambda *args, **kwargs: SimpleNamespace(
+                status_code=HTTPStatus.UNAUTHORIZED
+            )
+        )
+        monkeypatch.setattr(homework_module.rate_limiter, 'acquire',
+                            lambda token: None)
+        runner = TenantRunner(registry, poll=None, period=600)
+        bot = FakeBot()
+        homework_module.register_command(
+            registry, runner, *command(bot, 42, 'bad-token')
+        )
+        assert len(registry) == 0
+        assert bot.sent, 'Бот должен ответить, что токен не принят.'
+
+
+class TestCommandPolling:
+
+    def test_single_replica_polls_updates(self, monkeypatch, tmp_path,
+                                          homework_module):
+        started = []
+
+        class FakeUpdater:
+            def __init__(self, bot=None, use_context=True):
+                self.dispatcher = SimpleNamespace(
+                    add_handler=lambda handler: None
+                )
+
+            def start_polling(self):
+                started.append(self)
+
+            def stop(self):
+                started.remove(self)
+
+        monkeypatch.setattr(homework_module, 'Updater', FakeUpdater)
+        path = str(tmp_path / 'bot.db')
+        replicas = [
+            LeaseKeeper(
+                Lease('telegram', owner=owner, path=path),
+                on_change=homework_module.CommandPolling(FakeBot(), [])
+            )
+            for owner in ('a', 'b')
+        ]
+        for replica in replicas:
+            replica.start()
+        assert len(started) == 1, (
+            'getUpdates для токена бота должна вызывать одна реплика.'
+        )
+        for replica in replicas:
+            replica.stop()
+        assert not started
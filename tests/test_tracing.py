@@ -0,0 +1,151 @@
+import json
+
+import pytest
+
+from notifiers import CallableNotifier, Dispatcher
+from outbox import Outbox
+from state import HomeworkState
+from tracing import NOOP_SPAN, Tracer
+from utils import FakeBot
+
+
+def read_spans(path):
+    with open(path, encoding='utf-8') as trace_file:
+        return [json.loads(line) for line in trace_file]
+
+
+class TestTracer:
+
+    def test_disabled_tracer_returns_noop(self):
+        tracer = Tracer()
+        assert tracer.trace('iteration') is NOOP_SPAN
+        assert tracer.span('get_api_answer') is NOOP_SPAN
+
+    def test_span_outside_trace_is_noop(self, tmp_path):
+        tracer = Tracer(str(tmp_path / 'trace.jsonl'))
+        assert tracer.span('get_api_answer') is NOOP_SPAN
+
+    def test_nested_spans(self, tmp_path):
+        path = tmp_path / 'trace.jsonl'
+        tracer = Tracer(str(path))
+        with tracer.trace('iteration'):
+            with tracer.span('parse_status') as span:
+                span.set(homework='hw1')
+                with tracer.span('send_message'):
+                    pass
+        tracer.close()
+        send, parse, iteration = read_spans(path)
+        assert {span['trace_id'] for span in (send, parse, iteration)} == {
+            iteration['trace_id']
+        }, 'Все отрезки итерации должны принадлежать одной трассе.'
+        assert iteration['parent_span_id'] is None
+        assert parse['parent_span_id'] == iteration['span_id']
+        assert send['parent_span_id'] == parse['span_id']
+        assert parse['attributes'] == {'homework': 'hw1'}
+        assert parse['end_time_unix_nano'] >= parse['start_time_unix_nano']
+
+    def test_error_status(self, tmp_path):
+        path = tmp_path / 'trace.jsonl'
+        tracer = Tracer(str(path))
+        with pytest.raises(KeyError):
+            with tracer.trace('iteration'):
+                raise KeyError('status')
+        tracer.close()
+        span, = read_spans(path)
+        assert span['status']['code'] == 'ERROR'
+
+    def test_sampling(self, tmp_path):
+        path = tmp_path / 'trace.jsonl'
+        tracer = Tracer(str(path), sample_rate=0)
+        with tracer.trace('iteration'):
+            pass
+        assert not path.exists(), 'Невыбранные итерации не пишутся.'
+
+    def test_enqueue_is_not_render_time(self, tmp_path, monkeypatch,
+                                        homework_module):
+        path = tmp_path / 'trace.jsonl'
+        tracer = Tracer(str(path))
+        monkeypatch.setattr(homework_module, 'tracer', tracer)
+        dispatcher = Dispatcher(
+            [CallableNotifier('telegram', lambda text, topic: None)], Outbox()
+        )
+        with tracer.trace('iteration'):
+            homework_module.check_homeworks(
+                [{'homework_name': 'hw1', 'status': 'approved'}],
+                HomeworkState(), dispatcher
+            )
+        dispatcher.close()
+        tracer.close()
+        parse, enqueue, homework, iteration = read_spans(path)
+        assert (parse['name'], enqueue['name']) == ('parse_status', 'enqueue')
+        assert parse['parent_span_id'] == homework['span_id'], (
+            'Запись в очередь не должна входить в отрезок parse_status.'
+        )
+        assert enqueue['parent_span_id'] == homework['span_id']
+
+    def test_homework_has_own_trace(self, tmp_path, monkeypatch,
+                                    homework_module):
+        path = tmp_path / 'trace.jsonl'
+        tracer = Tracer(str(path))
+        monkeypatch.setattr(homework_module, 'tracer', tracer)
+        bot = FakeBot()
+        dispatcher = Dispatcher([CallableNotifier(
+            'telegram', lambda text, topic: homework_module.deliver_message(
+                bot, text, topic, None
+            )
+        )], Outbox())
+        state = HomeworkState()
+        for status in ('reviewing', 'approved'):
+            with tracer.trace('iteration'):
+                homework_module.check_homeworks(
+                    [{'homework_name': 'hw1', 'status': status}],
+                    state, dispatcher
+                )
+                dispatcher.flush()
+        dispatcher.close()
+        tracer.close()
+        spans = read_spans(path)
+        iterations = [span for span in spans if span['name'] == 'iteration']
+        homeworks = [span for span in spans if span['name'] == 'homework']
+        assert len({span['trace_id'] for span in homeworks}) == 1, (
+            'Отрезки одной работы из разных итераций должны быть в одной '
+            'трассе.'
+        )
+        assert homeworks[0]['trace_id'] not in {
+            span['trace_id'] for span in iterations
+        }
+        assert {link['trace_id'] for span in homeworks
+                for link in span['links']} == {
+            span['trace_id'] for span in iterations
+        }, 'Трасса работы должна ссылаться на итерации.'
+        sends = [span for span in spans if span['name'] == 'send_message']
+        assert len(sends) == 2 and all(
+            span['trace_id'] == homeworks[0]['trace_id'] for span in sends
+        )
+
+    def test_pipeline_stages_trace_like_iteration(self, tmp_path,
+                                                  monkeypatch,
+                                                  homework_module):
+        path = tmp_path / 'trace.jsonl'
+        tracer = Tracer(str(path))
+        monkeypatch.setattr(homework_module, 'tracer', tracer)
+        dispatcher = Dispatcher(
+            [CallableNotifier('telegram', lambda text, topic: None)], Outbox()
+        )
+        state = HomeworkState()
+        with tracer.trace('iteration'):
+            homework, _ = homework_module.diff_stage(state, {
+                'homeworks': [{'homework_name': 'hw1', 'status': 'approved'}],
+                'current_date': 0,
+            })
+            item, = homework_module.render_stage(homework)
+            homework_module.deliver_stage(state, dispatcher, item)
+        dispatcher.close()
+        tracer.close()
+        names = [span['name'] for span in read_spans(path)
+                 if span['name'] != 'homework']
+        assert names[:3] == ['check_response', 'parse_status', 'enqueue'], (
+            'Стадии конвейера должны записывать те же отрезки, что и '
+            'check_homeworks.'
+        )
+        assert state.history.search('', 'hw1')
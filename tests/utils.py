@@ -1,9 +1,10 @@
+import json
 import logging
 from collections import namedtuple
 from contextlib import contextmanager
 from http import HTTPStatus
 from inspect import signature
-from types import ModuleType
+from types import ModuleType, SimpleNamespace
 
 
 def check_function(scope: ModuleType, func_name: str, params_qty: int = 0):
@@ -103,3 +104,59 @@ class MockTelegramBot:
 
 class BreakInfiniteLoop(Exception):
     pass
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class RawResponse:
+    status_code = HTTPStatus.OK
+
+    def __init__(self, data):
+        self.content = json.dumps(data).encode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeBot:
+    def __init__(self, broken_edit=False):
+        self.broken_edit = broken_edit
+        self.sent = []
+        self.chat_ids = []
+        self.edited = []
+
+    def send_message(self, chat_id=None, text=None):
+        self.sent.append(text)
+        self.chat_ids.append(chat_id)
+        return SimpleNamespace(message_id=100 + len(self.sent))
+
+    def edit_message_text(self, chat_id=None, message_id=None, text=None):
+        if self.broken_edit:
+            raise Exception('Message to edit not found')
+        self.edited.append((message_id, text))
+
+
+class FakeMessage:
+    def __init__(self):
+        self.deleted = False
+
+    def delete(self):
+        self.deleted = True
+
+
+def command(bot, chat_id, *args):
+    """Update and context of a bot command sent from chat_id."""
+    update = SimpleNamespace(
+        effective_chat=SimpleNamespace(id=chat_id),
+        effective_message=FakeMessage()
+    )
+    return update, SimpleNamespace(bot=bot, args=list(args))